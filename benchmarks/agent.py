@@ -0,0 +1,181 @@
+"""
+End-to-end agent benchmark against local stand-ins (no DIAL proxy or docker user service needed).
+
+Drives `DialClient` in regular (`get_completion`) and streaming (`stream_completion_gen`) modes over scripted
+scenarios and reports time to first token, tokens per second, tool round latency, turn time and allocations.
+
+Run: python -m benchmarks.agent [--iterations 5] [--token-rate 0] [--output results.json]
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import statistics
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass, field
+
+from benchmarks.stand_ins import Scenario, StandInProcess
+from task.client import DialClient
+from task.models.message import Message
+from task.models.role import Role
+from task.tools.users.create_user_tool import CreateUserTool
+from task.tools.users.delete_user_tool import DeleteUserTool
+from task.tools.users.get_user_by_id_tool import GetUserByIdTool
+from task.tools.users.search_users_tool import SearchUsersTool
+from task.tools.users.update_user_tool import UpdateUserTool
+from task.tools.users.user_client import UserClient
+
+SCENARIOS = [
+    Scenario(name="no_tools"),
+    Scenario(name="one_tool_round", tool_rounds=[[("get_user_by_id", {"id": 7})]]),
+    Scenario(
+        name="parallel_tools",
+        tool_rounds=[[("get_user_by_id", {"id": user_id}) for user_id in range(1, 6)]]
+    ),
+    Scenario(
+        name="tool_chain",
+        tool_rounds=[
+            [("search_users", {"name": "Name1"})],
+            [("get_user_by_id", {"id": 12})],
+            [("update_user", {"id": 12, "new_info": {"company": "EPAM"}})],
+        ]
+    ),
+]
+
+
+@dataclass
+class TurnMetrics:
+    ttft: float
+    total: float
+    tokens: int
+    tokens_per_second: float | None
+    tool_rounds: list[float] = field(default_factory=list)
+
+
+@dataclass
+class Result:
+    scenario: str
+    mode: str
+    ttft_ms: float
+    total_ms: float
+    tokens_per_second: float | None
+    tool_round_ms: float | None
+    peak_alloc_kib: float
+
+
+def _create_client(dial_url: str, user_client: UserClient, **kwargs) -> DialClient:
+    return DialClient(
+        endpoint=dial_url,
+        deployment_name="benchmark",
+        api_key="benchmark",
+        tools=[
+            GetUserByIdTool(user_client),
+            SearchUsersTool(user_client),
+            CreateUserTool(user_client),
+            UpdateUserTool(user_client),
+            DeleteUserTool(user_client),
+        ],
+        **kwargs
+    )
+
+
+async def _streaming_turn(client: DialClient) -> TurnMetrics:
+    messages = [Message(role=Role.USER, content="benchmark")]
+    started_at = time.perf_counter()
+    first_token_at = None
+    tokens = 0
+    async for event in client.stream_completion_gen(messages):
+        if isinstance(event, str):
+            if first_token_at is None:
+                first_token_at = time.perf_counter()
+            tokens += 1
+    finished_at = time.perf_counter()
+    first_token_at = first_token_at or finished_at
+    stream_time = finished_at - first_token_at
+    return TurnMetrics(
+        ttft=first_token_at - started_at,
+        total=finished_at - started_at,
+        tokens=tokens,
+        tokens_per_second=(tokens - 1) / stream_time if tokens > 1 and stream_time > 0 else None
+    )
+
+
+async def _regular_turn(client: DialClient) -> TurnMetrics:
+    messages = [Message(role=Role.USER, content="benchmark")]
+    started_at = time.perf_counter()
+    response = await asyncio.to_thread(client.get_completion, messages, False)
+    total = time.perf_counter() - started_at
+    # Whole answer comes at once, so time to first token equals turn time
+    return TurnMetrics(ttft=total, total=total, tokens=len(response.content.split()), tokens_per_second=None)
+
+
+async def _run_mode(stand_ins: StandInProcess, scenario: Scenario, mode: str, iterations: int) -> Result:
+    turn = _streaming_turn if mode == "streaming" else _regular_turn
+    async with UserClient(endpoint=stand_ins.users_url) as user_client, \
+            _create_client(stand_ins.dial_url, user_client) as client:
+        # Warm up connections and lazy imports, they are not part of steady state
+        await turn(client)
+
+        metrics = []
+        for _ in range(iterations):
+            stand_ins.reset()
+            turn_metrics = await turn(client)
+            turn_metrics.tool_rounds = stand_ins.tool_round_latencies()
+            metrics.append(turn_metrics)
+
+        tracemalloc.start()
+        await turn(client)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    tool_rounds = [latency for m in metrics for latency in m.tool_rounds]
+    tokens_per_second = [m.tokens_per_second for m in metrics if m.tokens_per_second]
+    return Result(
+        scenario=scenario.name,
+        mode=mode,
+        ttft_ms=statistics.median(m.ttft for m in metrics) * 1000,
+        total_ms=statistics.median(m.total for m in metrics) * 1000,
+        tokens_per_second=statistics.median(tokens_per_second) if tokens_per_second else None,
+        tool_round_ms=statistics.median(tool_rounds) * 1000 if tool_rounds else None,
+        peak_alloc_kib=peak / 1024,
+    )
+
+
+def _format(value: float | None, digits: int = 1) -> str:
+    return "-" if value is None else f"{value:.{digits}f}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--token-rate", type=float, default=0, help="stand-in tokens per second, 0 - unthrottled")
+    parser.add_argument("--first-token-delay", type=float, default=0.05, help="stand-in delay before answer, s")
+    parser.add_argument("--user-latency", type=float, default=0.02, help="user service stand-in latency, s")
+    parser.add_argument("--output", help="write results as JSON to compare runs")
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'scenario':<16} {'mode':<10} {'ttft ms':>9} {'turn ms':>9} {'tok/s':>9} {'tool round ms':>14} "
+          f"{'peak KiB':>9}")
+    for scenario in SCENARIOS:
+        scenario.tokens_per_second = args.token_rate
+        scenario.first_token_delay = args.first_token_delay
+        with StandInProcess(scenario, user_latency=args.user_latency) as stand_ins:
+            for mode in ("regular", "streaming"):
+                # Client prints tool results, keep them out of the report
+                with contextlib.redirect_stdout(io.StringIO()):
+                    result = asyncio.run(_run_mode(stand_ins, scenario, mode, args.iterations))
+                results.append(result)
+                print(f"{result.scenario:<16} {result.mode:<10} {result.ttft_ms:>9.1f} {result.total_ms:>9.1f} "
+                      f"{_format(result.tokens_per_second, 0):>9} {_format(result.tool_round_ms):>14} "
+                      f"{result.peak_alloc_kib:>9.0f}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump([asdict(result) for result in results], f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Record/replay benchmark: records agent turns against local stand-ins into a cassette, stops the stand-ins and replays
+the same turns from the cassette at recorded speed and as fast as possible. Realtime replay should match the live
+turn time, fast replay is the client-side overhead (request building, parsing, tool dispatch) on its own.
+
+Run: python -m benchmarks.replay [--iterations 5] [--token-rate 200] [--cassette replay.json]
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import statistics
+import tempfile
+import time
+
+from benchmarks.agent import SCENARIOS, _create_client, _regular_turn, _streaming_turn
+from benchmarks.stand_ins import Scenario, StandInProcess
+from task.cassette import RECORD, REPLAY, Cassette
+from task.tools.users.user_client import UserClient
+
+
+async def _turns(dial_url: str, users_url: str, mode: str, iterations: int, cassette: Cassette) -> list[float]:
+    turn = _streaming_turn if mode == "streaming" else _regular_turn
+    durations = []
+    async with UserClient(endpoint=users_url, cassette=cassette) as user_client, \
+            _create_client(dial_url, user_client, cassette=cassette) as client:
+        for _ in range(iterations):
+            started_at = time.perf_counter()
+            await turn(client)
+            durations.append(time.perf_counter() - started_at)
+    return durations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--token-rate", type=float, default=200.0, help="streamed tokens per second, 0 - unlimited")
+    parser.add_argument("--cassette", help="keep the recorded cassette in this file")
+    args = parser.parse_args()
+
+    print(f"{'scenario':<16} {'mode':<10} {'live ms':>9} {'realtime ms':>12} {'fast ms':>9} {'interactions':>13}")
+    for base in SCENARIOS:
+        scenario = Scenario(
+            name=base.name,
+            tool_rounds=base.tool_rounds,
+            answer_tokens=base.answer_tokens,
+            tokens_per_second=args.token_rate,
+            first_token_delay=base.first_token_delay
+        )
+        for mode in ("regular", "streaming"):
+            path = args.cassette or os.path.join(tempfile.mkdtemp(), "cassette.json")
+            recorder = Cassette(path, mode=RECORD)
+            # Clients print requests and tool calls, keep the report readable
+            with contextlib.redirect_stdout(io.StringIO()):
+                with StandInProcess(scenario) as stand_ins:
+                    dial_url, users_url = stand_ins.dial_url, stand_ins.users_url
+                    live = asyncio.run(_turns(dial_url, users_url, mode, args.iterations, recorder))
+                recorder.save()
+                # Stand-ins are stopped, replay doesn't touch the network
+                realtime = asyncio.run(_turns(
+                    dial_url, users_url, mode, args.iterations, Cassette(path, mode=REPLAY, realtime=True)
+                ))
+                fast = asyncio.run(_turns(dial_url, users_url, mode, args.iterations, Cassette(path, mode=REPLAY)))
+            print(
+                f"{scenario.name:<16} {mode:<10} {statistics.median(live) * 1000:>9.1f} "
+                f"{statistics.median(realtime) * 1000:>12.1f} {statistics.median(fast) * 1000:>9.2f} "
+                f"{len(recorder):>13}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Per-call request encode time as conversation history grows.
+
+Compares encoding the whole history on every call (`json.dumps` of `to_dict()` list, as before)
+with `DialClient._request_body`, which joins cached per-message fragments.
+
+Run: python -m benchmarks.serialization
+"""
+import json
+import time
+
+from task.client import DialClient
+from task.models.message import Message
+from task.models.role import Role
+from task.tools.users.create_user_tool import CreateUserTool
+from task.tools.users.get_user_by_id_tool import GetUserByIdTool
+from task.tools.users.search_users_tool import SearchUsersTool
+from task.tools.users.update_user_tool import UpdateUserTool
+from task.tools.users.user_client import UserClient
+
+HISTORY_SIZES = [10, 50, 100, 250, 500, 1000]
+REPEATS = 20
+
+
+def _make_turn(i: int) -> list[Message]:
+    tool_call_id = f"call_{i}"
+    return [
+        Message(role=Role.USER, content=f"Find user number {i} and tell me everything about them, please."),
+        Message(
+            role=Role.AI,
+            content="",
+            tool_calls=[{
+                "id": tool_call_id,
+                "type": "function",
+                "function": {"name": "get_user_by_id", "arguments": json.dumps({"id": i})}
+            }]
+        ),
+        Message(
+            role=Role.TOOL,
+            name="get_user_by_id",
+            tool_call_id=tool_call_id,
+            content="```\n" + "".join(f"  field_{k}: value {k} of user {i}\n" for k in range(12)) + "```\n"
+        ),
+        Message(role=Role.AI, content=f"User {i} is a very nice person. " * 5),
+    ]
+
+
+def _per_call_ms(fn, repeats: int = REPEATS) -> float:
+    started_at = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - started_at) / repeats * 1000
+
+
+def main():
+    user_client = UserClient()
+    client = DialClient(
+        endpoint="http://localhost",
+        deployment_name="bench",
+        api_key="bench",
+        tools=[GetUserByIdTool(user_client), SearchUsersTool(user_client), CreateUserTool(user_client),
+               UpdateUserTool(user_client)]
+    )
+    messages = [Message(role=Role.SYSTEM, content="You are a User Management Agent. " * 20)]
+    turn = 0
+
+    print(f"{'messages':>10} {'full encode, ms':>16} {'cached, ms':>12} {'new msg only, ms':>18}")
+    for size in HISTORY_SIZES:
+        while len(messages) < size:
+            messages.extend(_make_turn(turn))
+            turn += 1
+        # warm up fragments of the existing history, as it happens after the first call
+        client._request_body(messages, stream=True)
+        assert json.loads(client._request_body(messages, stream=True)) == {
+            "messages": [msg.to_dict() for msg in messages], "tools": client._tools, "stream": True
+        }
+
+        full_ms = _per_call_ms(lambda: json.dumps(
+            {"stream": True, "messages": [msg.to_dict() for msg in messages], "tools": client._tools}
+        ).encode())
+        cached_ms = _per_call_ms(lambda: client._request_body(messages, stream=True))
+        new_message = Message(role=Role.USER, content="One more question")
+        new_ms = _per_call_ms(lambda: new_message.to_json(), repeats=1)
+        print(f"{len(messages):>10} {full_ms:>16.3f} {cached_ms:>12.3f} {new_ms:>18.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Microbenchmark of streamed completion parsing over recorded streams from `benchmarks/data`.
+
+Compares the previous line-by-line parser (`async for line in response.content` + `json.loads` per line) with
+`SSEDecoder` + `ChatStreamAccumulator` over `iter_any()`, using stdlib `json` and, when installed, `orjson`.
+Recorded bytes are replayed in network-sized chunks through a real `aiohttp.StreamReader`.
+
+Run: python -m benchmarks.sse_parser
+"""
+import asyncio
+import json
+import random
+import time
+from pathlib import Path
+from unittest.mock import Mock
+
+import aiohttp
+
+from task import json_codec
+from task.streaming.sse import ChatStreamAccumulator, SSEDecoder
+
+DATA_DIR = Path(__file__).parent / "data"
+REPEATS = 50
+
+
+def _split_chunks(raw: bytes, seed: int = 42) -> list[bytes]:
+    rnd = random.Random(seed)
+    chunks = []
+    position = 0
+    while position < len(raw):
+        size = rnd.randint(256, 4096)
+        chunks.append(raw[position:position + size])
+        position += size
+    return chunks
+
+
+async def _replay(chunks: list[bytes]) -> aiohttp.StreamReader:
+    reader = aiohttp.StreamReader(Mock(), limit=2 ** 16, loop=asyncio.get_running_loop())
+
+    async def _produce():
+        for chunk in chunks:
+            reader.feed_data(chunk)
+            await asyncio.sleep(0)
+        reader.feed_eof()
+
+    asyncio.create_task(_produce())
+    return reader
+
+
+async def _legacy_parse(chunks: list[bytes]) -> tuple[str, list]:
+    contents = []
+    final_tool_calls = {}
+    async for line in await _replay(chunks):
+        if line.startswith(b'data: '):
+            data = line[len(b'data: '):].strip()
+            if data == b'[DONE]':
+                break
+            chunk = json.loads(data)
+            delta = chunk.get("choices", [])[0].get("delta", {})
+            content = delta.get('content', '')
+            if content:
+                contents.append(content)
+            for tool_call in delta.get('tool_calls') or []:
+                index = tool_call.get('index')
+                if index not in final_tool_calls:
+                    final_tool_calls[index] = tool_call
+                    final_tool_calls[index].setdefault("function", {}).setdefault("arguments", "")
+                else:
+                    final_tool_calls[index]["function"]["arguments"] += tool_call.get('function', {}).get('arguments', '')
+    return "".join(contents), list(final_tool_calls.values())
+
+
+async def _decoder_parse(chunks: list[bytes]) -> tuple[str, list]:
+    decoder = SSEDecoder()
+    accumulator = ChatStreamAccumulator()
+    async for chunk in (await _replay(chunks)).iter_any():
+        for data in decoder.feed(chunk):
+            accumulator.feed(data)
+        if accumulator.done:
+            break
+    return accumulator.content, accumulator.tool_calls
+
+
+async def _measure(fn, chunks: list[bytes]) -> float:
+    started_at = time.perf_counter()
+    for _ in range(REPEATS):
+        await fn(chunks)
+    return (time.perf_counter() - started_at) / REPEATS * 1000
+
+
+async def _run():
+    # `json_codec` parses with its `loads` attribute, switch it to compare both backends
+    installed_loads = json_codec.loads
+    backends = [("json", json.loads)] + ([("orjson", json_codec.orjson.loads)] if json_codec.orjson else [])
+    for path in sorted(DATA_DIR.glob("*.sse")):
+        raw = path.read_bytes()
+        chunks = _split_chunks(raw)
+        events = raw.count(b"\n\ndata:") + 1
+        assert await _legacy_parse(chunks) == await _decoder_parse(chunks)
+
+        print(f"{path.name}: {len(raw) / 1024:.0f} KiB, {events} events, {len(chunks)} chunks")
+        legacy_ms = await _measure(_legacy_parse, chunks)
+        print(f"  {'legacy line parser':<28} {legacy_ms:8.3f} ms/stream")
+        for backend, loads in backends:
+            json_codec.loads = loads
+            decoder_ms = await _measure(_decoder_parse, chunks)
+            print(f"  {'SSEDecoder + ' + backend:<28} {decoder_ms:8.3f} ms/stream  x{legacy_ms / decoder_ms:.2f}")
+        json_codec.loads = installed_loads
+
+
+def main():
+    asyncio.run(_run())
+
+
+if __name__ == "__main__":
+    main()
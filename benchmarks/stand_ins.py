@@ -0,0 +1,284 @@
+"""
+Local stand-ins for DIAL chat completions and the mock user service, used by offline benchmarks.
+
+`DialStandIn` is OpenAI compatible: regular and SSE streaming responses, configurable time to first token and token
+rate, and scripted tool calls (one list of calls per tool round). `UserServiceStandIn` serves `/v1/users` API with
+generated users and configurable latency. `StandInProcess` runs both in a child process, so they don't share
+event loop, CPU time and allocations with the measured client.
+
+Run standalone: python -m benchmarks.stand_ins
+"""
+import asyncio
+import json
+import multiprocessing
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any
+
+import requests
+from aiohttp import web
+
+
+@dataclass
+class Scenario:
+    name: str
+    # Tool calls the model makes in each round: [(function name, arguments), ...] per round
+    tool_rounds: list[list[tuple[str, dict[str, Any]]]] = field(default_factory=list)
+    answer_tokens: int = 200
+    # 0 means stream tokens as fast as possible
+    tokens_per_second: float = 0
+    first_token_delay: float = 0.05
+
+
+@dataclass
+class RequestLog:
+    received_at: float
+    finished_at: float = 0.0
+    stream: bool = False
+
+
+class _StandIn:
+
+    def __init__(self):
+        self._app = web.Application()
+        self.__runner: web.AppRunner | None = None
+        self.url = ""
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        self.__runner = web.AppRunner(self._app, access_log=None)
+        await self.__runner.setup()
+        site = web.TCPSite(self.__runner, host, port)
+        await site.start()
+        bound_port = self.__runner.addresses[0][1]
+        self.url = f"http://{host}:{bound_port}"
+        return self.url
+
+    async def stop(self) -> None:
+        if self.__runner:
+            await self.__runner.cleanup()
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.stop()
+
+
+class DialStandIn(_StandIn):
+
+    def __init__(self, scenario: Scenario):
+        super().__init__()
+        self.scenario = scenario
+        self.requests: list[RequestLog] = []
+        self._app.router.add_post("/openai/deployments/{deployment}/chat/completions", self.__chat_completions)
+        self._app.router.add_get("/_benchmark/requests", self.__requests_log)
+        self._app.router.add_post("/_benchmark/reset", self.__reset)
+
+    async def __requests_log(self, request: web.Request) -> web.Response:
+        return web.json_response([asdict(log) for log in self.requests])
+
+    async def __reset(self, request: web.Request) -> web.Response:
+        self.requests.clear()
+        return web.Response(status=204)
+
+    def __current_round(self, messages: list[dict[str, Any]]) -> int:
+        """Number of tool rounds already done in the current turn (after the last user message)"""
+        rounds = 0
+        for message in reversed(messages):
+            if message["role"] == "user":
+                break
+            if message["role"] == "assistant" and message.get("tool_calls"):
+                rounds += 1
+        return rounds
+
+    def __answer_words(self) -> list[str]:
+        return [f"tok{i} " for i in range(self.scenario.answer_tokens)]
+
+    async def __chat_completions(self, request: web.Request) -> web.StreamResponse:
+        log = RequestLog(received_at=time.perf_counter())
+        self.requests.append(log)
+        body = await request.json()
+        tool_round = self.__current_round(body["messages"])
+        tool_calls = None
+        if tool_round < len(self.scenario.tool_rounds) and body.get("tool_choice") != "none":
+            tool_calls = [
+                {
+                    "id": f"call_{tool_round}_{i}",
+                    "type": "function",
+                    "function": {"name": name, "arguments": json.dumps(arguments)}
+                }
+                for i, (name, arguments) in enumerate(self.scenario.tool_rounds[tool_round])
+            ]
+
+        await asyncio.sleep(self.scenario.first_token_delay)
+        if body.get("stream"):
+            log.stream = True
+            response = await self.__stream(request, tool_calls)
+        else:
+            if tool_calls:
+                message = {"role": "assistant", "content": None, "tool_calls": tool_calls}
+            else:
+                await self.__sleep_tokens(self.scenario.answer_tokens)
+                message = {"role": "assistant", "content": "".join(self.__answer_words())}
+            response = web.json_response({
+                "choices": [{"index": 0, "message": message, "finish_reason": "tool_calls" if tool_calls else "stop"}]
+            })
+        log.finished_at = time.perf_counter()
+        return response
+
+    async def __sleep_tokens(self, tokens: int) -> None:
+        if self.scenario.tokens_per_second:
+            await asyncio.sleep(tokens / self.scenario.tokens_per_second)
+
+    async def __stream(self, request: web.Request, tool_calls: list[dict[str, Any]] | None) -> web.StreamResponse:
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+
+        async def send(delta: dict[str, Any], finish_reason: str | None = None):
+            chunk = {
+                "id": "chatcmpl-standin",
+                "object": "chat.completion.chunk",
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
+            }
+            await response.write(b"data: " + json.dumps(chunk).encode() + b"\n\n")
+
+        if tool_calls:
+            for index, tool_call in enumerate(tool_calls):
+                arguments = tool_call["function"]["arguments"]
+                await send({"tool_calls": [{
+                    "index": index,
+                    "id": tool_call["id"],
+                    "type": "function",
+                    "function": {"name": tool_call["function"]["name"], "arguments": ""}
+                }]})
+                for start in range(0, len(arguments), 8):
+                    await send({"tool_calls": [{"index": index, "function": {"arguments": arguments[start:start + 8]}}]})
+            await send({}, "tool_calls")
+        else:
+            delay = 1 / self.scenario.tokens_per_second if self.scenario.tokens_per_second else 0
+            for word in self.__answer_words():
+                await send({"content": word})
+                if delay:
+                    await asyncio.sleep(delay)
+            await send({}, "stop")
+        await response.write(b"data: [DONE]\n\n")
+        return response
+
+
+class UserServiceStandIn(_StandIn):
+
+    def __init__(self, user_count: int = 1000, latency: float = 0.02):
+        super().__init__()
+        self.latency = latency
+        self.users: dict[int, dict[str, Any]] = {
+            user_id: {
+                "id": user_id,
+                "name": f"Name{user_id}",
+                "surname": f"Surname{user_id % 97}",
+                "email": f"user{user_id}@example.com",
+                "gender": "male" if user_id % 2 else "female",
+                "company": f"Company{user_id % 13}",
+                "about_me": "Likes hiking and reading.",
+            }
+            for user_id in range(1, user_count + 1)
+        }
+        self._app.router.add_get("/v1/users", self.__list)
+        self._app.router.add_get("/v1/users/search", self.__search)
+        self._app.router.add_get("/v1/users/{id}", self.__get)
+        self._app.router.add_post("/v1/users", self.__create)
+        self._app.router.add_put("/v1/users/{id}", self.__update)
+        self._app.router.add_delete("/v1/users/{id}", self.__delete)
+
+    async def __list(self, request: web.Request) -> web.Response:
+        await asyncio.sleep(self.latency)
+        return web.json_response(list(self.users.values()))
+
+    async def __search(self, request: web.Request) -> web.Response:
+        await asyncio.sleep(self.latency)
+        found = [
+            user for user in self.users.values()
+            if all(value.lower() in str(user.get(key, "")).lower() for key, value in request.query.items())
+        ]
+        return web.json_response(found)
+
+    async def __get(self, request: web.Request) -> web.Response:
+        await asyncio.sleep(self.latency)
+        user = self.users.get(int(request.match_info["id"]))
+        if user is None:
+            return web.json_response({"detail": "User not found"}, status=404)
+        return web.json_response(user)
+
+    async def __create(self, request: web.Request) -> web.Response:
+        await asyncio.sleep(self.latency)
+        user = await request.json()
+        user["id"] = max(self.users, default=0) + 1
+        self.users[user["id"]] = user
+        return web.json_response(user, status=201)
+
+    async def __update(self, request: web.Request) -> web.Response:
+        await asyncio.sleep(self.latency)
+        user = self.users.get(int(request.match_info["id"]))
+        if user is None:
+            return web.json_response({"detail": "User not found"}, status=404)
+        user.update({key: value for key, value in (await request.json()).items() if value is not None})
+        return web.json_response(user, status=201)
+
+    async def __delete(self, request: web.Request) -> web.Response:
+        await asyncio.sleep(self.latency)
+        self.users.pop(int(request.match_info["id"]), None)
+        return web.Response(status=204)
+
+
+def _serve(scenario: Scenario, user_count: int, user_latency: float, urls: multiprocessing.Queue) -> None:
+    async def main():
+        async with DialStandIn(scenario) as dial, UserServiceStandIn(user_count, user_latency) as users:
+            urls.put((dial.url, users.url))
+            await asyncio.Event().wait()
+
+    asyncio.run(main())
+
+
+class StandInProcess:
+    """Runs DIAL and user service stand-ins in a child process"""
+
+    def __init__(self, scenario: Scenario, user_count: int = 1000, user_latency: float = 0.02):
+        self.__scenario = scenario
+        self.__user_count = user_count
+        self.__user_latency = user_latency
+        self.__process: multiprocessing.Process | None = None
+        self.dial_url = ""
+        self.users_url = ""
+
+    def __enter__(self) -> "StandInProcess":
+        urls = multiprocessing.Queue()
+        self.__process = multiprocessing.Process(
+            target=_serve,
+            args=(self.__scenario, self.__user_count, self.__user_latency, urls),
+            daemon=True
+        )
+        self.__process.start()
+        self.dial_url, self.users_url = urls.get(timeout=30)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.__process.terminate()
+        self.__process.join()
+
+    def reset(self) -> None:
+        requests.post(f"{self.dial_url}/_benchmark/reset")
+
+    def tool_round_latencies(self) -> list[float]:
+        """
+        Seconds between the end of a model response with tool calls and the next model request of the same turn,
+        i.e. tool execution plus client side overhead. Call `reset` before each turn.
+        """
+        logs = requests.get(f"{self.dial_url}/_benchmark/requests").json()
+        return [current["received_at"] - previous["finished_at"] for previous, current in zip(logs, logs[1:])]
+
+
+if __name__ == "__main__":
+    example = Scenario(name="standalone", tool_rounds=[[("get_user_by_id", {"id": 1})]], tokens_per_second=50)
+    with StandInProcess(example) as stand_ins:
+        print(f"DIAL stand-in: {stand_ins.dial_url}\nUser service stand-in: {stand_ins.users_url}")
+        input("Press Enter to stop\n")
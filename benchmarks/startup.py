@@ -0,0 +1,72 @@
+"""
+Agent cold start: import time breakdown of a module (via `python -X importtime` in a fresh interpreter) and time to
+construct `DialClient` with all tools.
+
+Run: python -m benchmarks.startup [--module task.factory] [--top 15]
+"""
+import argparse
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+_ENV = dict(os.environ, DIAL_API_KEY=os.environ.get("DIAL_API_KEY") or "benchmark")
+
+
+def import_times(module: str) -> list[tuple[str, int, int]]:
+    """(module, self us, cumulative us) for every module imported by `import module` in a fresh interpreter"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        env=_ENV,
+        check=True
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def construction_time() -> float:
+    """Seconds to import the factory and build `DialClient` with all tools in a fresh interpreter"""
+    code = (
+        "import time; started_at = time.perf_counter()\n"
+        "from task.factory import create_dial_client\n"
+        "from task.tools.users.user_client import UserClient\n"
+        "create_dial_client(UserClient(), warmup_connections=0)\n"
+        "print(time.perf_counter() - started_at)"
+    )
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, env=_ENV, check=True)
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="task.factory")
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    rows = import_times(args.module)
+    total_us = next((cumulative for name, _, cumulative in rows if name == args.module), sum(r[1] for r in rows))
+    by_package: dict[str, int] = defaultdict(int)
+    for name, self_us, _ in rows:
+        by_package[name.split(".")[0]] += self_us
+
+    print(f"import {args.module}: {total_us / 1000:.1f} ms, {len(rows)} modules\n")
+    print(f"{'package':<30} {'self ms':>9} {'share':>7}")
+    for package, self_us in sorted(by_package.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"{package:<30} {self_us / 1000:>9.1f} {self_us / total_us:>7.1%}")
+
+    print(f"\n{'module':<50} {'cumulative ms':>14}")
+    for name, _, cumulative_us in sorted(rows, key=lambda row: -row[2])[:args.top]:
+        print(f"{name:<50} {cumulative_us / 1000:>14.1f}")
+
+    print(f"\nimport + DialClient with all tools: {construction_time() * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
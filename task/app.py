@@ -1,21 +1,12 @@
 import asyncio
-import os
 
-from task.client import DialClient
+from task.factory import create_dial_client, create_user_client
 from task.models.conversation import Conversation
 from task.models.message import Message
 from task.models.role import Role
+from task.models.turn_end import TerminationReason, TurnEnd
 from task.prompts import SYSTEM_PROMPT
-from task.tools.users.create_user_tool import CreateUserTool
-from task.tools.users.delete_user_tool import DeleteUserTool
-from task.tools.users.get_user_by_id_tool import GetUserByIdTool
-from task.tools.users.search_users_tool import SearchUsersTool
-from task.tools.users.update_user_tool import UpdateUserTool
-from task.tools.users.user_client import UserClient
-from task.tools.web_search import WebSearchTool
-
-DIAL_ENDPOINT = "https://ai-proxy.lab.epam.com"
-API_KEY = os.getenv('DIAL_API_KEY')
+from task.streaming.sinks import CoalescingSink, ConsoleSink
 
 def to_console(chunk: str):
     print(chunk, end="", flush=True)
@@ -30,39 +21,30 @@ async def main():
     #    - Add User message to Conversation
     #    - Call DialClient with conversation history
     #    - Add Assistant message to Conversation and print its content
-    user_client = UserClient()
-    dial_client = DialClient(
-        endpoint=DIAL_ENDPOINT,
-        deployment_name="gpt-4",
-        api_key=API_KEY,
-        tools=[
-            WebSearchTool(api_key=API_KEY, endpoint=DIAL_ENDPOINT),
-            GetUserByIdTool(user_client),
-            SearchUsersTool(user_client),
-            CreateUserTool(user_client),
-            UpdateUserTool(user_client),
-            DeleteUserTool(user_client)
-        ]
-    )
-    conversation = Conversation()
-    conversation.add_message(Message(role=Role.SYSTEM, content=SYSTEM_PROMPT))
-    response_mode = input("Choose response mode (1 - streaming, 2 - regular) - ").strip()
-    while True:
-        user_input = input("> ").strip()
-        conversation.add_message(Message(role=Role.USER, content=user_input))
-        if response_mode == "1":
-            async for ev in dial_client.stream_completion_gen(conversation.messages):
-                if isinstance(ev, Message):
-                    conversation.add_message(ev)
-                if isinstance(ev, str):
-                    print(ev, end="", flush=True)
-            # response_message = await dial_client.stream_completion(conversation.messages, to_console)
-            # conversation.add_message(response_message)
-        else:
-            response_message = dial_client.get_completion(conversation.messages, print_request=True)
-            conversation.add_message(response_message)
-            print(response_message.content)
-
+    async with create_user_client() as user_client, create_dial_client(user_client) as dial_client:
+        conversation = Conversation()
+        conversation.add_message(Message(role=Role.SYSTEM, content=SYSTEM_PROMPT))
+        response_mode = input("Choose response mode (1 - streaming, 2 - regular) - ").strip()
+        console = CoalescingSink(ConsoleSink())
+        while True:
+            user_input = input("> ").strip()
+            conversation.add_message(Message(role=Role.USER, content=user_input))
+            if response_mode == "1":
+                async for ev in dial_client.stream_completion_gen(conversation.messages, console.flush):
+                    if isinstance(ev, Message):
+                        conversation.add_message(ev)
+                    if isinstance(ev, str):
+                        await console.write(ev)
+                    if isinstance(ev, TurnEnd) and ev.reason != TerminationReason.COMPLETED:
+                        await console.flush()
+                        print(f"\nTurn stopped: {ev.reason} after {ev.tool_rounds} tool rounds")
+                await console.flush()
+                # response_message = await dial_client.stream_completion(conversation.messages, to_console)
+                # conversation.add_message(response_message)
+            else:
+                response_message = dial_client.get_completion(conversation.messages, print_request=True)
+                conversation.add_message(response_message)
+                print(response_message.content)
 
 asyncio.run(
     main()
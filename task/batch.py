@@ -0,0 +1,147 @@
+"""
+Batch mode: runs prompts from a JSONL file through the agent with bounded concurrency.
+
+Input line: {"id": "...", "prompt": "..."} or {"id": "...", "messages": [{"role": "...", "content": "..."}, ...]}
+(`request_id` is accepted instead of `id`, line number is used when both are missing).
+Output line per item is appended as soon as the item finishes: id, status, response, termination reason,
+tool rounds, ttft and elapsed seconds (or error). On restart items already written with status "ok" are skipped.
+
+Run: python -m task.batch prompts.jsonl results.jsonl --concurrency 16
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from typing import Any
+
+from task.client import DialClient
+from task.factory import create_dial_client, create_user_client
+from task.models.message import Message
+from task.models.role import Role
+from task.models.turn_end import TurnEnd
+from task.prompts import SYSTEM_PROMPT
+
+
+def read_items(path: str) -> list[tuple[str, dict[str, Any]]]:
+    items = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            item = json.loads(line)
+            item_id = str(item.get("id") or item.get("request_id") or line_number)
+            items.append((item_id, item))
+    return items
+
+
+def read_completed_ids(path: str) -> set[str]:
+    """Ids of items that already have successful result in output file"""
+    completed = set()
+    if not os.path.exists(path):
+        return completed
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                result = json.loads(line)
+            except ValueError:
+                # Last line may be cut if previous run was killed while writing it
+                continue
+            if result.get("status") == "ok":
+                completed.add(result["id"])
+    return completed
+
+
+def to_messages(item: dict[str, Any], system_prompt: str | None) -> list[Message]:
+    if "messages" in item:
+        messages = [Message.from_dict(msg) for msg in item["messages"]]
+    else:
+        messages = [Message(role=Role.USER, content=str(item["prompt"]))]
+    if system_prompt and messages[0].role != Role.SYSTEM:
+        messages.insert(0, Message(role=Role.SYSTEM, content=system_prompt))
+    return messages
+
+
+async def run_item(dial_client: DialClient, item_id: str, item: dict[str, Any], system_prompt: str | None) -> dict:
+    started_at = time.perf_counter()
+    ttft = None
+    response = None
+    turn_end = None
+    try:
+        messages = to_messages(item, system_prompt)
+        async for event in dial_client.stream_completion_gen(messages):
+            if isinstance(event, str):
+                if ttft is None:
+                    ttft = time.perf_counter() - started_at
+            elif isinstance(event, Message):
+                response = event.content
+            elif isinstance(event, TurnEnd):
+                turn_end = event
+    except Exception as e:
+        return {"id": item_id, "status": "error", "error": str(e), "elapsed": time.perf_counter() - started_at}
+    return {
+        "id": item_id,
+        "status": "ok" if response is not None else "error",
+        "response": response,
+        "reason": turn_end.reason if turn_end else None,
+        "tool_rounds": turn_end.tool_rounds if turn_end else 0,
+        "ttft": ttft,
+        "elapsed": time.perf_counter() - started_at,
+    }
+
+
+async def run_batch(
+        dial_client: DialClient,
+        input_path: str,
+        output_path: str,
+        concurrency: int = 8,
+        system_prompt: str | None = SYSTEM_PROMPT,
+) -> None:
+    completed = read_completed_ids(output_path)
+    pending = [(item_id, item) for item_id, item in read_items(input_path) if item_id not in completed]
+    print(f"{len(pending)} items to run, {len(completed)} already completed")
+
+    queue: asyncio.Queue[tuple[str, dict[str, Any]]] = asyncio.Queue()
+    for entry in pending:
+        queue.put_nowait(entry)
+    counters = {"done": 0, "failed": 0}
+
+    with open(output_path, "a", encoding="utf-8") as output:
+        # Fixed number of workers instead of task per item keeps memory flat for big inputs
+        async def worker():
+            while not queue.empty():
+                item_id, item = queue.get_nowait()
+                result = await run_item(dial_client, item_id, item, system_prompt)
+                output.write(json.dumps(result, ensure_ascii=False) + "\n")
+                output.flush()
+                counters["done"] += 1
+                if result["status"] != "ok":
+                    counters["failed"] += 1
+                print(f"[{counters['done']}/{len(pending)}] {item_id}: {result['status']} in {result['elapsed']:.2f}s")
+
+        await asyncio.gather(*(worker() for _ in range(max(1, min(concurrency, len(pending))))))
+    print(f"Finished: {counters['done'] - counters['failed']} ok, {counters['failed']} failed")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help="JSONL file with prompts or conversations")
+    parser.add_argument("output", help="JSONL file for results, appended to and used to resume")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--no-system-prompt", action="store_true", help="don't prepend SYSTEM_PROMPT")
+    args = parser.parse_args()
+
+    async with create_user_client() as user_client, \
+            create_dial_client(user_client, connection_limit_per_host=args.concurrency) as dial_client:
+        await run_batch(
+            dial_client,
+            args.input,
+            args.output,
+            concurrency=args.concurrency,
+            system_prompt=None if args.no_system_prompt else SYSTEM_PROMPT,
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
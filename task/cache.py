@@ -0,0 +1,130 @@
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Any, TypeVar
+
+T = TypeVar("T")
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        requests = self.hits + self.misses
+        return self.hits / requests if requests else 0.0
+
+
+class TTLCache:
+    """Thread-safe LRU cache with optional per-entry time to live"""
+
+    def __init__(self, max_size: int = 1024, ttl: float | None = None):
+        if max_size <= 0:
+            raise ValueError("max_size must be positive")
+        self.__max_size = max_size
+        self.__ttl = ttl
+        self.__entries: OrderedDict[Hashable, tuple[Any, float | None]] = OrderedDict()
+        self.__lock = threading.Lock()
+        self.stats = CacheStats()
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is None:
+                self.stats.misses += 1
+                return default
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self.__entries[key]
+                self.stats.misses += 1
+                return default
+            self.__entries.move_to_end(key)
+            self.stats.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any, ttl: float | None = None) -> None:
+        ttl = self.__ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        with self.__lock:
+            self.__entries[key] = (value, expires_at)
+            self.__entries.move_to_end(key)
+            while len(self.__entries) > self.__max_size:
+                self.__entries.popitem(last=False)
+                self.stats.evictions += 1
+
+    def pop(self, key: Hashable) -> Any:
+        with self.__lock:
+            entry = self.__entries.pop(key, None)
+        return entry[0] if entry else None
+
+    def remove_if(self, predicate: Callable[[Hashable], bool]) -> int:
+        """Removes entries which keys match `predicate`, returns number of removed entries"""
+        with self.__lock:
+            keys = [key for key in self.__entries if predicate(key)]
+            for key in keys:
+                del self.__entries[key]
+        return len(keys)
+
+    def clear(self) -> None:
+        with self.__lock:
+            self.__entries.clear()
+
+    def snapshot(self) -> list[tuple[Hashable, Any, float | None]]:
+        """Live entries as `(key, value, remaining ttl seconds)` from least to most recently used"""
+        now = time.monotonic()
+        with self.__lock:
+            return [
+                (key, value, None if expires_at is None else expires_at - now)
+                for key, (value, expires_at) in self.__entries.items()
+                if expires_at is None or expires_at > now
+            ]
+
+    def restore(self, entries: list[tuple[Hashable, Any, float | None]]) -> None:
+        """Puts entries produced by `snapshot`, already expired ones are skipped"""
+        for key, value, remaining in entries:
+            if remaining is None or remaining > 0:
+                self.put(key, value, ttl=remaining)
+
+
+class RequestCoalescer:
+    """
+    Makes concurrent calls with the same key share one execution: the first caller runs the function,
+    others wait for its result (or exception). Works across threads.
+    """
+
+    def __init__(self):
+        self.__lock = threading.Lock()
+        self.__inflight: dict[Hashable, Future] = {}
+        self.coalesced = 0
+
+    def run(self, key: Hashable, fn: Callable[[], T]) -> T:
+        with self.__lock:
+            future = self.__inflight.get(key)
+            is_leader = future is None
+            if is_leader:
+                future = Future()
+                self.__inflight[key] = future
+            else:
+                self.coalesced += 1
+        if not is_leader:
+            return future.result()
+
+        try:
+            result = fn()
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self.__lock:
+                del self.__inflight[key]
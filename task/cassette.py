@@ -0,0 +1,396 @@
+"""
+Record/replay HTTP transport. In `record` mode real responses of DIAL and the user service are written to a cassette
+(JSON file) with time to headers and arrival time of every body chunk; in `replay` mode the same requests are answered
+from the cassette without network, either as fast as possible (client-side overhead only) or with `realtime=True`
+at the recorded speed (production latency profile).
+
+Plugs into `requests` sessions as a transport adapter (`Cassette.mount`) and into `aiohttp` by wrapping the session
+(`Cassette.wrap`). Requests are matched by method, URL (query parameters in any order) and body hash; identical
+requests get recorded responses in recorded order.
+"""
+import asyncio
+import base64
+import hashlib
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import deque
+from typing import TYPE_CHECKING, Any
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
+
+if TYPE_CHECKING:
+    import aiohttp
+    import requests
+
+RECORD = "record"
+REPLAY = "replay"
+
+
+class CassetteMiss(LookupError):
+    """Replayed request has no (more) recorded responses"""
+
+
+def _normalize_url(url: str, params: Any = None) -> str:
+    parts = urlsplit(url)
+    query = parse_qsl(parts.query, keep_blank_values=True)
+    if params:
+        items = params.items() if isinstance(params, dict) else params
+        query.extend((str(key), str(value)) for key, value in items)
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(sorted(query)), ""))
+
+
+def _body_hash(body: bytes | str | None) -> str:
+    if isinstance(body, str):
+        body = body.encode("utf-8")
+    return hashlib.sha256(body or b"").hexdigest()
+
+
+def _encode_chunk(offset: float, data: bytes) -> dict[str, Any]:
+    """Chunk with its arrival time, as text when it is valid UTF-8, so cassettes can be read and edited"""
+    try:
+        return {"t": round(offset, 6), "text": data.decode("utf-8")}
+    except UnicodeDecodeError:
+        return {"t": round(offset, 6), "base64": base64.b64encode(data).decode("ascii")}
+
+
+def _decode_chunk(chunk: dict[str, Any]) -> bytes:
+    if "text" in chunk:
+        return chunk["text"].encode("utf-8")
+    return base64.b64decode(chunk["base64"])
+
+
+class Cassette:
+
+    def __init__(self, path: str, mode: str = REPLAY, realtime: bool = False, match_body: bool = True):
+        """
+        :param mode: `record` real responses or `replay` recorded ones (the cassette file must exist)
+        :param realtime: replay with recorded time to headers and chunk arrival times
+        :param match_body: match requests by body hash too, disable to replay recorded responses in order even if
+                           request bodies changed (e.g. after prompt or tool changes)
+        """
+        if mode not in (RECORD, REPLAY):
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        self.__path = path
+        self.__mode = mode
+        self.__realtime = realtime
+        self.__match_body = match_body
+        self.__interactions: list[dict[str, Any]] = []
+        self.__queues: dict[tuple[str, str, str | None], deque[dict[str, Any]]] = {}
+        self.__lock = threading.Lock()
+        if mode == REPLAY:
+            with open(path, "r", encoding="utf-8") as f:
+                self.__interactions = json.load(f)["interactions"]
+            for interaction in self.__interactions:
+                request = interaction["request"]
+                key = self.__key(request["method"], request["url"], request["body_sha256"])
+                self.__queues.setdefault(key, deque()).append(interaction)
+
+    @property
+    def mode(self) -> str:
+        return self.__mode
+
+    @property
+    def realtime(self) -> bool:
+        return self.__realtime
+
+    def __len__(self) -> int:
+        return len(self.__interactions)
+
+    def __key(self, method: str, url: str, body_sha256: str) -> tuple[str, str, str | None]:
+        return method.upper(), url, body_sha256 if self.__match_body else None
+
+    def _record(
+            self,
+            method: str,
+            url: str,
+            body_sha256: str,
+            status: int,
+            headers: list[tuple[str, str]],
+            elapsed: float
+    ) -> list[dict[str, Any]]:
+        """Adds interaction, returns its list of chunks to be filled as the body arrives"""
+        chunks: list[dict[str, Any]] = []
+        interaction = {
+            "request": {"method": method.upper(), "url": url, "body_sha256": body_sha256},
+            "response": {"status": status, "headers": headers, "elapsed": round(elapsed, 6), "chunks": chunks}
+        }
+        with self.__lock:
+            self.__interactions.append(interaction)
+        return chunks
+
+    def _replay(self, method: str, url: str, body_sha256: str) -> dict[str, Any]:
+        """Recorded response for the request"""
+        with self.__lock:
+            queue = self.__queues.get(self.__key(method, url, body_sha256))
+            if not queue:
+                raise CassetteMiss(f"No recorded response for {method.upper()} {url}")
+            return queue.popleft()["response"]
+
+    def save(self) -> None:
+        """Writes recorded interactions to temp file and atomically replaces the cassette file with it"""
+        with self.__lock:
+            data = json.dumps({"interactions": self.__interactions}, ensure_ascii=False, indent=1)
+        directory = os.path.dirname(os.path.abspath(self.__path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(data)
+            os.replace(tmp_path, self.__path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def mount(self, session: "requests.Session") -> "requests.Session":
+        """Routes `session` requests through the cassette, recording responses of its current adapters"""
+        for prefix in ("http://", "https://"):
+            session.mount(prefix, _CassetteAdapter(self, session.get_adapter(prefix)))
+        return session
+
+    def wrap(self, session: "aiohttp.ClientSession", base_url: str | None = None) -> "CassetteSession":
+        """`session` (created with `base_url`, if any) routed through the cassette"""
+        return CassetteSession(self, session, base_url)
+
+
+class _CassetteAdapter:
+    """`requests` transport adapter: records responses of `inner` adapter or replays them"""
+
+    def __init__(self, cassette: Cassette, inner: Any):
+        self.__cassette = cassette
+        self.__inner = inner
+
+    def send(self, request: "requests.PreparedRequest", **kwargs: Any) -> "requests.Response":
+        url = _normalize_url(request.url)
+        body_sha256 = _body_hash(request.body)
+        if self.__cassette.mode == RECORD:
+            started_at = time.perf_counter()
+            response = self.__inner.send(request, **kwargs)
+            # Headers are parsed, `response.elapsed` is set by the session only after the adapter returns
+            elapsed = time.perf_counter() - started_at
+            # Regular (not streamed) requests only, the whole body arrives as one chunk
+            content = response.content
+            chunks = self.__cassette._record(
+                request.method, url, body_sha256, response.status_code, list(response.headers.items()), elapsed
+            )
+            chunks.append(_encode_chunk(time.perf_counter() - started_at, content))
+            return response
+        return self.__replay(request, url, body_sha256)
+
+    def __replay(self, request: "requests.PreparedRequest", url: str, body_sha256: str) -> "requests.Response":
+        from http import HTTPStatus
+
+        import requests
+        from requests.structures import CaseInsensitiveDict
+        from requests.utils import get_encoding_from_headers
+
+        started_at = time.perf_counter()
+        recorded = self.__cassette._replay(request.method, url, body_sha256)
+        chunks = recorded["chunks"]
+        content = b"".join(_decode_chunk(chunk) for chunk in chunks)
+        response = requests.Response()
+        response.status_code = recorded["status"]
+        response.headers = CaseInsensitiveDict(recorded["headers"])
+        response.encoding = get_encoding_from_headers(response.headers)
+        try:
+            response.reason = HTTPStatus(response.status_code).phrase
+        except ValueError:
+            response.reason = None
+        if self.__cassette.realtime:
+            # Headers now, body is read by the session (after it measured `elapsed`) at its recorded time
+            time.sleep(max(0.0, started_at + recorded["elapsed"] - time.perf_counter()))
+            response.raw = _DelayedBody(content, started_at + max([0.0] + [chunk["t"] for chunk in chunks]))
+        else:
+            response._content = content
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self) -> None:
+        self.__inner.close()
+
+
+class _DelayedBody(io.BytesIO):
+    """Raw body of a replayed `requests` response, available at `ready_at` (`time.perf_counter()`)"""
+
+    def __init__(self, content: bytes, ready_at: float):
+        super().__init__(content)
+        self.__ready_at = ready_at
+
+    def read(self, size: int | None = -1, **kwargs: Any) -> bytes:
+        delay = self.__ready_at - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        return super().read(size)
+
+
+class _RecordingStream:
+    """Body of a real `aiohttp` response, records every chunk with its arrival time"""
+
+    def __init__(self, content: "aiohttp.StreamReader", chunks: list[dict[str, Any]], started_at: float):
+        self.__content = content
+        self.__chunks = chunks
+        self.__started_at = started_at
+
+    def __record(self, data: bytes) -> bytes:
+        if data:
+            self.__chunks.append(_encode_chunk(time.perf_counter() - self.__started_at, data))
+        return data
+
+    async def readany(self) -> bytes:
+        return self.__record(await self.__content.readany())
+
+    async def read(self) -> bytes:
+        return self.__record(await self.__content.read())
+
+    async def iter_any(self):
+        while chunk := await self.readany():
+            yield chunk
+
+
+class _ReplayStream:
+    """Recorded body, chunks are returned at their recorded arrival times in realtime mode"""
+
+    def __init__(self, chunks: list[dict[str, Any]], started_at: float, realtime: bool):
+        self.__chunks = deque(chunks)
+        self.__started_at = started_at
+        self.__realtime = realtime
+
+    async def readany(self) -> bytes:
+        if not self.__chunks:
+            return b""
+        chunk = self.__chunks.popleft()
+        if self.__realtime:
+            delay = self.__started_at + chunk["t"] - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        return _decode_chunk(chunk)
+
+    async def read(self) -> bytes:
+        parts = []
+        while chunk := await self.readany():
+            parts.append(chunk)
+        return b"".join(parts)
+
+    async def iter_any(self):
+        while chunk := await self.readany():
+            yield chunk
+
+
+class _CassetteResponse:
+    """The part of `aiohttp.ClientResponse` used by the clients, over a recording or replayed body"""
+
+    def __init__(self, status: int, headers: Any, content: _RecordingStream | _ReplayStream, response: Any = None):
+        self.status = status
+        self.headers = headers
+        self.content = content
+        self.__response = response
+        self.__body: bytes | None = None
+
+    async def read(self) -> bytes:
+        if self.__body is None:
+            self.__body = await self.content.read()
+        return self.__body
+
+    async def text(self, encoding: str | None = None) -> str:
+        if encoding is None:
+            encoding = self.__response.get_encoding() if self.__response is not None else "utf-8"
+        return (await self.read()).decode(encoding)
+
+    async def json(self, **kwargs: Any) -> Any:
+        return json.loads(await self.text())
+
+    def release(self) -> None:
+        if self.__response is not None:
+            self.__response.release()
+
+    def close(self) -> None:
+        if self.__response is not None:
+            self.__response.close()
+
+    async def __aenter__(self) -> "_CassetteResponse":
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.release()
+
+
+class _RequestContext:
+    """Like `aiohttp` request context manager: can be awaited or used in `async with`"""
+
+    def __init__(self, coroutine):
+        self.__coroutine = coroutine
+        self.__response: _CassetteResponse | None = None
+
+    def __await__(self):
+        return self.__coroutine.__await__()
+
+    async def __aenter__(self) -> _CassetteResponse:
+        self.__response = await self.__coroutine
+        return self.__response
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.__response.release()
+
+
+class CassetteSession:
+    """Drop-in for the part of `aiohttp.ClientSession` used by the clients, routed through the cassette"""
+
+    def __init__(self, cassette: Cassette, session: "aiohttp.ClientSession", base_url: str | None = None):
+        self.__cassette = cassette
+        self.__session = session
+        self.__base_url = base_url
+
+    @property
+    def closed(self) -> bool:
+        return self.__session.closed
+
+    async def close(self) -> None:
+        await self.__session.close()
+
+    def request(self, method: str, url: str, **kwargs: Any) -> _RequestContext:
+        return _RequestContext(self.__request(method, url, **kwargs))
+
+    def get(self, url: str, **kwargs: Any) -> _RequestContext:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs: Any) -> _RequestContext:
+        return self.request("POST", url, **kwargs)
+
+    def put(self, url: str, **kwargs: Any) -> _RequestContext:
+        return self.request("PUT", url, **kwargs)
+
+    def delete(self, url: str, **kwargs: Any) -> _RequestContext:
+        return self.request("DELETE", url, **kwargs)
+
+    def head(self, url: str, **kwargs: Any) -> _RequestContext:
+        return self.request("HEAD", url, **kwargs)
+
+    async def __request(self, method: str, url: str, **kwargs: Any) -> _CassetteResponse:
+        from multidict import CIMultiDict, CIMultiDictProxy
+
+        full_url = _normalize_url(urljoin(self.__base_url, url) if self.__base_url else url, kwargs.get("params"))
+        body = json.dumps(kwargs["json"]) if kwargs.get("json") is not None else kwargs.get("data")
+        body_sha256 = _body_hash(body)
+        started_at = time.perf_counter()
+        if self.__cassette.mode == RECORD:
+            response = await self.__session.request(method, url, **kwargs)
+            chunks = self.__cassette._record(
+                method, full_url, body_sha256, response.status, list(response.headers.items()),
+                time.perf_counter() - started_at
+            )
+            return _CassetteResponse(
+                response.status, response.headers, _RecordingStream(response.content, chunks, started_at), response
+            )
+
+        recorded = self.__cassette._replay(method, full_url, body_sha256)
+        if self.__cassette.realtime:
+            await asyncio.sleep(recorded["elapsed"])
+        return _CassetteResponse(
+            recorded["status"],
+            CIMultiDictProxy(CIMultiDict(recorded["headers"])),
+            _ReplayStream(recorded["chunks"], started_at, self.__cassette.realtime)
+        )
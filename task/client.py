@@ -1,15 +1,32 @@
+import asyncio
 import json
-from collections.abc import Callable
-from typing import Any, AsyncIterator, Union
-
-import requests
-import aiohttp
+import time
+from collections.abc import Awaitable, Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, AsyncIterator, Union
 
+from task.context_window import ContextWindow
+from task.deployments import Deployment, DeploymentPool
+from task.instrumentation import Tracer, TurnTrace
 from task.models.message import Message
 from task.models.role import Role
+from task.models.turn_end import TerminationReason, TurnEnd
+from task.retry import HedgePolicy, HTTPStatusError, RetryPolicy
+from task.streaming.sse import ChatStreamAccumulator, SSEDecoder
 from task.tools.base import BaseTool
+from task.tools.registry import ToolRegistry
+from task.tools.router import ToolRouter
+
+if TYPE_CHECKING:
+    # HTTP clients are imported on first use: regular mode needs only `requests`, streaming only `aiohttp`
+    import aiohttp
+    import requests
 
-StreamEvent = Union[str, Message]
+    from task.cassette import Cassette
+    from task.completion_cache import CachedCompletion, CompletionCache
+    from task.streaming.sinks import Sink
+
+StreamEvent = Union[str, Message, TurnEnd]
 
 class DialClient:
 
@@ -18,8 +35,40 @@ class DialClient:
             endpoint: str,
             deployment_name: str,
             api_key: str,
-            tools: list[BaseTool] | None = None
+            tools: list[BaseTool] | ToolRegistry | None = None,
+            connection_limit: int = 100,
+            connection_limit_per_host: int = 0,
+            keepalive_timeout: float = 75.0,
+            dns_cache_ttl: int | None = 300,
+            warmup_connections: int = 0,
+            tool_workers: int = 8,
+            tool_timeout: float | None = 60.0,
+            max_tool_rounds: int = 10,
+            turn_timeout: float | None = None,
+            context_window: ContextWindow | None = None,
+            tracer: Tracer | None = None,
+            connect_timeout: float | None = 10.0,
+            read_timeout: float | None = 60.0,
+            first_token_timeout: float | None = None,
+            retry: RetryPolicy | None = None,
+            hedge: HedgePolicy | None = None,
+            speculative_tools: bool = True,
+            tool_router: ToolRouter | None = None,
+            deployments: DeploymentPool | None = None,
+            completion_cache: "CompletionCache | None" = None,
+            cassette: "Cassette | None" = None,
     ):
+        """
+        :param read_timeout: max seconds without any data from DIAL (whole response in regular mode)
+        :param first_token_timeout: max seconds from sending a streaming request to its first chunk, then it is retried
+        :param retry: policy for failed requests, `RetryPolicy()` by default, `RetryPolicy(max_attempts=1)` disables it
+        :param hedge: sends a second streaming request if the first one is slow to start, disabled by default
+        :param speculative_tools: in streaming mode start read-only tools as soon as their arguments are streamed
+        :param tool_router: picks tools sent with each request, all tools are sent if not set
+        :param deployments: interchangeable deployments to route requests between, instead of `deployment_name`
+        :param completion_cache: answers repeated requests from cache, tool calls only if all called tools are read-only
+        :param cassette: records DIAL responses to or replays them from a cassette file, connection warmup is skipped
+        """
         #TODO:
         # 1. If not api_key then raise error
         # 2. Add `self.__endpoint` with formatted `endpoint` with model (model=deployment_name):
@@ -30,16 +79,124 @@ class DialClient:
         # 6. Optional: print endpoint and tools schemas
         if not api_key:
             raise ValueError("API key is required")
-        self.__endpoint = f"{endpoint}/openai/deployments/{deployment_name}/chat/completions"
+        # Endpoint URL is built by `Deployment.url`, single deployment is a pool of one
+        self.__deployments = deployments or DeploymentPool.single(deployment_name, endpoint)
         self.__api_key = api_key
-        self.__tools_dict = {}
-        self._tools = []
-        if tools:
-            for tool in tools:
-                self.__tools_dict[tool.name] = tool
-                tool_schema = tool.schema
-                self._tools.append(tool_schema)
-        print(f"DialClient initialized with endpoint: {self.__endpoint}")
+        self.__connection_limit = connection_limit
+        self.__connection_limit_per_host = connection_limit_per_host
+        self.__keepalive_timeout = keepalive_timeout
+        self.__dns_cache_ttl = dns_cache_ttl
+        self.__warmup_connections = warmup_connections
+        self.__session: "aiohttp.ClientSession | None" = None
+        self.__sync_session: "requests.Session | None" = None
+        self.__tool_executor = ThreadPoolExecutor(max_workers=tool_workers, thread_name_prefix="tool")
+        self.__tool_timeout = tool_timeout
+        self.__max_tool_rounds = max_tool_rounds
+        self.__turn_timeout = turn_timeout
+        self.__context_window = context_window
+        self.__tracer = tracer or Tracer()
+        self.__connect_timeout = connect_timeout
+        self.__read_timeout = read_timeout
+        self.__first_token_timeout = first_token_timeout
+        self.__retry = retry or RetryPolicy()
+        self.__hedge = hedge
+        self.__speculative_tools = speculative_tools
+        self.__tools_dict = tools if isinstance(tools, ToolRegistry) else ToolRegistry(tools)
+        self._tools = self.__tools_dict.schemas
+        self.__tools_json = self.__tools_dict.tools_json
+        self.__tool_router = tool_router
+        self.__completion_cache = completion_cache
+        self.__cassette = cassette
+        # Cached answers are shared by interchangeable deployments of the pool
+        self.__cache_scope = ",".join(sorted(d.url for d in self.__deployments.deployments))
+        print(f"DialClient initialized with endpoints: {', '.join(d.url for d in self.__deployments.deployments)}")
+
+    @property
+    def deployments(self) -> DeploymentPool:
+        return self.__deployments
+
+    async def __aenter__(self) -> "DialClient":
+        await self._get_session()
+        if self.__warmup_connections and self.__cassette is None:
+            await self.warmup(self.__warmup_connections)
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        await self.aclose()
+
+    async def _get_session(self) -> "aiohttp.ClientSession":
+        """Returns pooled session shared by all streaming calls, creates it on first use"""
+        import aiohttp
+
+        if self.__session is None or self.__session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.__connection_limit,
+                limit_per_host=self.__connection_limit_per_host,
+                keepalive_timeout=self.__keepalive_timeout,
+                use_dns_cache=self.__dns_cache_ttl is not None,
+                ttl_dns_cache=self.__dns_cache_ttl,
+            )
+            session = aiohttp.ClientSession(connector=connector, trace_configs=[self._connection_trace_config()])
+            self.__session = self.__cassette.wrap(session) if self.__cassette is not None else session
+        return self.__session
+
+    @staticmethod
+    def _connection_trace_config() -> "aiohttp.TraceConfig":
+        """Reports new connection setup (DNS, TCP, TLS) as `http_connect` span of the turn passed in `trace_request_ctx`"""
+        import aiohttp
+
+        async def on_connection_create_start(session, context, params):
+            context.connect_started_at = time.perf_counter()
+
+        async def on_connection_create_end(session, context, params):
+            trace = context.trace_request_ctx
+            if isinstance(trace, TurnTrace):
+                trace.record("http_connect", context.connect_started_at)
+
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_connection_create_start.append(on_connection_create_start)
+        trace_config.on_connection_create_end.append(on_connection_create_end)
+        return trace_config
+
+    def _get_sync_session(self) -> "requests.Session":
+        """Returns pooled `requests` session used by `get_completion`"""
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        if self.__sync_session is None:
+            pool_size = self.__connection_limit_per_host or self.__connection_limit or 10
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+            self.__sync_session = requests.Session()
+            self.__sync_session.mount("https://", adapter)
+            self.__sync_session.mount("http://", adapter)
+            if self.__cassette is not None:
+                self.__cassette.mount(self.__sync_session)
+        return self.__sync_session
+
+    async def warmup(self, connections: int = 1) -> None:
+        """Opens `connections` keep-alive connections to every endpoint host ahead of the first request"""
+        import aiohttp
+
+        session = await self._get_session()
+        origins = {deployment.origin for deployment in self.__deployments.deployments}
+
+        async def _touch(origin: str):
+            try:
+                async with session.head(origin, allow_redirects=False) as response:
+                    await response.read()
+            except aiohttp.ClientError as e:
+                print(f"Connection warmup failed: {e}")
+
+        await asyncio.gather(*(_touch(origin) for origin in origins for _ in range(connections)))
+
+    async def aclose(self) -> None:
+        if self.__session is not None and not self.__session.closed:
+            await self.__session.close()
+        self.__session = None
+        if self.__sync_session is not None:
+            self.__sync_session.close()
+            self.__sync_session = None
+        self.__tool_executor.shutdown(wait=False, cancel_futures=True)
 
 
     def get_completion(self, messages: list[Message], print_request: bool = True) -> Message:
@@ -47,14 +204,14 @@ class DialClient:
         # 1. create `headers` dict with:
         #   - "api-key": self._api_key
         #   - "Content-Type": "application/json"
-        # 2. create `request_data` dict with:
-        #   - "messages": [msg.to_dict() for msg in messages]
+        # 2. create request body (`_request_body`) with:
+        #   - "messages": [msg.to_dict() for msg in messages] (built from cached `msg.to_json()` fragments)
         #   - "tools": self._tools
         # 3. Optional: print request (message history)
         # 4. Make POST request (requests) with:
         #   - url=self._endpoint
         #   - headers=headers
-        #   - json=request_data
+        #   - data=request_body
         # 5. If response status code is 200:
         #   - get response as json
         #   - get "choices" from response json
@@ -69,29 +226,64 @@ class DialClient:
         #           - append `ai_response` to `messages`
         #           - call `_process_tool_calls` with `tool_calls` and assign result to `tool_messages` variable
         #           - add `tool_messages` to `messages` (use `extend` method)
-        #           - make recursive call (return `get_completion` with `messages` and `print_request`)
+        #           - go to the next round of the loop with updated `messages`
         #       No: return `ai_response` (final assistant response)
         # Otherwise raise exception
+        started_at = time.monotonic()
+        tool_rounds = 0
+        trace = TurnTrace(self.__tracer, mode="regular")
+        reason = "error"
+        try:
+            while True:
+                remaining = self._remaining_budget(started_at)
+                if remaining == 0:
+                    reason = TerminationReason.TIMEOUT
+                    raise TimeoutError(
+                        f"Turn exceeded {self.__turn_timeout} seconds budget after {tool_rounds} tool rounds"
+                    )
+                force_answer = tool_rounds >= self.__max_tool_rounds
+                ai_response, tool_calls = self._get_completion_round(
+                    messages, print_request, force_answer, remaining, trace
+                )
+                if not tool_calls:
+                    reason = TerminationReason.MAX_TOOL_ROUNDS if force_answer else TerminationReason.COMPLETED
+                    return ai_response
+
+                tool_messages = self._process_tool_calls(tool_calls, trace, self._remaining_budget(started_at))
+                messages.append(ai_response)
+                messages.extend(tool_messages)
+                tool_rounds += 1
+                trace.tool_round = tool_rounds
+        finally:
+            trace.end(reason=reason)
 
+    def _get_completion_round(
+            self,
+            messages: list[Message],
+            print_request: bool,
+            force_answer: bool,
+            timeout: float | None,
+            trace: TurnTrace
+    ) -> tuple[Message, list[dict[str, Any]]]:
+        """Makes one regular completion request, returns assistant message and tool calls to process (if any)"""
         headers = {
             "api-key": self.__api_key,
             "Content-Type": "application/json"
         }
-        request_data = {
-            "messages": [msg.to_dict() for msg in messages],
-            "tools": self._tools
-        }
+        with trace.span("request_build") as attributes:
+            request_body = self._request_body(messages, stream=False, force_answer=force_answer, attributes=attributes)
+            cache_key, cached = self._cache_lookup(request_body, attributes)
         if print_request:
             print("Request:")
             for msg in messages:
                 print(f"{msg.role.value.upper()}: {msg.content}")
             print("-" * 50)
-        response = requests.post(
-            url=self.__endpoint,
-            headers=headers,
-            json=request_data
-        )
-        if response.status_code == 200:
+        if cached is not None:
+            content = cached.content
+            tool_calls = cached.tool_calls or []
+            finish_reason = "tool_calls" if tool_calls else "stop"
+        else:
+            response = self._post_with_retries(headers, request_body, timeout, trace)
             response_json = response.json()
             choices = response_json.get("choices", [])
             if not choices:
@@ -102,194 +294,624 @@ class DialClient:
             message_data = choice.get("message", {})
             content = message_data.get("content", "")
             tool_calls = message_data.get("tool_calls", [])
-            ai_response = Message(
-                role=Role.AI,
-                content=content,
-                tool_calls=tool_calls
-            )
             finish_reason = choice.get("finish_reason", "")
-            if finish_reason == "tool_calls":
-                messages.append(ai_response)
-                tool_messages = self._process_tool_calls(tool_calls)
-                messages.extend(tool_messages)
-                return self.get_completion(messages, print_request)
-            return ai_response
-        else:
-            raise Exception(f"HTTP {response.status_code}: {response.text}")
+            if cache_key is not None and finish_reason in ("stop", "tool_calls"):
+                self._cache_store(cache_key, content, tool_calls if finish_reason == "tool_calls" else None)
+        if content:
+            trace.first_token()
+        if finish_reason != "tool_calls" or force_answer:
+            if force_answer:
+                print(f"Max tool rounds ({self.__max_tool_rounds}) reached, tools were disabled for the final answer")
+            return Message(role=Role.AI, content=content), []
 
-    async def stream_completion(self, messages: list[Message], on_chunk: Callable[[str], None]) -> Message:
-        headers = {
-            "api-key": self.__api_key,
-            "Content-Type": "application/json"
-        }
-        request_data = {
-            "stream": True,
-            "messages": [msg.to_dict() for msg in messages],
-            "tools": self._tools
-        }
+        ai_response = Message(
+            role=Role.AI,
+            content=content,
+            tool_calls=tool_calls
+        )
+        return ai_response, tool_calls
 
-        contents = []
-        final_tool_calls = {}
-        # NOTE:
-        # In this educational version, a new aiohttp.ClientSession is created inside
-        # each call to stream_completion / stream_completion_gen, including recursive
-        # tool-loop iterations.
-        #
-        # This is done intentionally to keep the code simple while learning how
-        # streaming and tool-calling work.
-        #
-        # In a production version, the session should be created once (per agent run
-        # or per client) and reused across all LLM calls, to avoid creating a new
-        # TCP/TLS connection on every tool iteration.
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                url=self.__endpoint,
-                headers=headers,
-                json=request_data
-            ) as response:
-                if response.status == 200:
-                    async for line in response.content:
-                        if line.startswith(b'data: '):
-                            data = line[len(b'data: '):].strip()
-                            if data == b'[DONE]':
-                                break
-                            chunk = json.loads(data)
-                            delta = chunk.get("choices", [])[0].get("delta", {})
-
-                            content = delta.get('content', '')
-                            if content:
-                                on_chunk(content)
-                                contents.append(content)
-
-                            for tool_call in delta.get('tool_calls') or []:
-                                index = tool_call.get('index')
-
-                                if index not in final_tool_calls:
-                                    final_tool_calls[index] = tool_call
-                                    final_tool_calls[index].setdefault("function", {}).setdefault("arguments", "")
-                                final_tool_calls[index]["function"]["arguments"] += tool_call.get('function', {}).get('arguments', '')
-                    ai_response = Message(role=Role.AI, content=''.join(contents), tool_calls=list(final_tool_calls.values()))
-                    messages.append(ai_response)
-                    if final_tool_calls:
-                        tool_messages = self._process_tool_calls(list(final_tool_calls.values()))
-                        messages.extend(tool_messages)
-                        return await self.stream_completion(messages, on_chunk)
-                    return ai_response
+    def _post_with_retries(
+            self,
+            headers: dict[str, str],
+            request_body: bytes,
+            timeout: float | None,
+            trace: TurnTrace
+    ) -> "requests.Response":
+        """POSTs the regular request, retrying failed attempts while the turn budget (`timeout`) allows"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        attempt = 0
+        while True:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            read_timeout = self.__read_timeout
+            if remaining is not None:
+                read_timeout = remaining if read_timeout is None else min(read_timeout, remaining)
+            request_started_at = time.perf_counter()
+            deployment = self.__deployments.acquire()
+            try:
+                try:
+                    response = self._get_sync_session().post(
+                        url=deployment.url,
+                        headers=headers,
+                        data=request_body,
+                        timeout=(self.__connect_timeout, read_timeout)
+                    )
+                    # `elapsed` is time until response headers are parsed, body is already read by `requests`
+                    elapsed = response.elapsed.total_seconds()
+                    trace.record(
+                        "ttfb", request_started_at, duration=elapsed, attempt=attempt, deployment=deployment.name
+                    )
+                    if response.status_code != 200:
+                        retry_after = response.headers.get("Retry-After")
+                        raise HTTPStatusError(response.status_code, response.text, retry_after)
+                except Exception as e:
+                    self.__deployments.release(deployment, error=e)
+                    raise
+                self.__deployments.release(deployment, ttft=elapsed)
+                return response
+            except Exception as e:
+                delay = self._retry_delay(attempt, e, deployment)
+                if delay is None or (deadline is not None and time.monotonic() + delay >= deadline):
+                    raise
+                error = str(e) or type(e).__name__
+                print(f"Request failed ({error}), retrying in {delay:.2f}s")
+                trace.record("retry", time.perf_counter(), duration=delay, attempt=attempt, error=error)
+                time.sleep(delay)
+                attempt += 1
+
+    async def stream_completion(
+            self,
+            messages: list[Message],
+            on_chunk: Union[Callable[[str], None], "Sink"]
+    ) -> Message:
+        """
+        `on_chunk` is called with every content chunk. A `Sink` gets them written and is flushed before tools
+        of each round run (they print their results) and at the turn end.
+        """
+        ai_response = None
+        on_round_end = None if callable(on_chunk) else on_chunk.flush
+        async for event in self.stream_completion_gen(messages, on_round_end):
+            if isinstance(event, str):
+                if callable(on_chunk):
+                    on_chunk(event)
                 else:
-                    raise Exception(f"HTTP {response.status}: {await response.text()}")
+                    await on_chunk.write(event)
+            elif isinstance(event, Message):
+                ai_response = event
+            else:
+                if not callable(on_chunk):
+                    await on_chunk.flush()
+                if event.reason == TerminationReason.TIMEOUT:
+                    raise TimeoutError(
+                        f"Turn exceeded {self.__turn_timeout} seconds budget after {event.tool_rounds} tool rounds"
+                    )
+        return ai_response
 
-    async def stream_completion_gen(self, messages: list[Message]) -> AsyncIterator[StreamEvent]:
+    async def stream_completion_gen(
+            self,
+            messages: list[Message],
+            on_round_end: Callable[[], Awaitable[None]] | None = None
+    ) -> AsyncIterator[StreamEvent]:
+        """
+        Runs the agent loop in streaming mode. Yields content chunks, then final assistant Message and
+        always finishes with `TurnEnd` event. Intermediate assistant/tool messages are appended to `messages`.
+        :param on_round_end: awaited when a streamed round calling tools ends, before the tools run, e.g. to flush
+            buffered chunks so they come out before tool output
+        """
         headers = {
             "api-key": self.__api_key,
             "Content-Type": "application/json"
         }
-        request_data = {
-            "stream": True,
-            "messages": [msg.to_dict() for msg in messages],
-            "tools": self._tools
-        }
+        session = await self._get_session()
+        started_at = time.monotonic()
+        tool_rounds = 0
+        trace = TurnTrace(self.__tracer, mode="streaming")
+        reason = "error"
+        try:
+            while True:
+                remaining = self._remaining_budget(started_at)
+                if remaining == 0:
+                    reason = TerminationReason.TIMEOUT
+                    yield TurnEnd(reason, tool_rounds, time.monotonic() - started_at)
+                    return
+                force_answer = tool_rounds >= self.__max_tool_rounds
+                with trace.span("request_build") as attributes:
+                    request_body = self._request_body(messages, stream=True, force_answer=force_answer, attributes=attributes)
+                    cache_key, cached = self._cache_lookup(request_body, attributes)
 
-        contents = []
-        final_tool_calls = {}
-        # NOTE:
-        # In this educational version, a new aiohttp.ClientSession is created inside
-        # each call to stream_completion / stream_completion_gen, including recursive
-        # tool-loop iterations.
-        #
-        # This is done intentionally to keep the code simple while learning how
-        # streaming and tool-calling work.
-        #
-        # In a production version, the session should be created once (per agent run
-        # or per client) and reused across all LLM calls, to avoid creating a new
-        # TCP/TLS connection on every tool iteration.
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                    url=self.__endpoint,
-                    headers=headers,
-                    json=request_data
-            ) as response:
-                if response.status == 200:
-                    async for line in response.content:
-                        if line.startswith(b'data: '):
-                            data = line[len(b'data: '):].strip()
-                            if data == b'[DONE]':
+                decoder = SSEDecoder()
+                accumulator = ChatStreamAccumulator()
+                # Read-only tools started while the stream is still open, by tool call id
+                speculative: dict[str, asyncio.Task] = {}
+                # Raw chunks of a response to be cached
+                recorded: list[bytes] | None = [] if cache_key is not None and cached is None else None
+                try:
+                    if cached is not None:
+                        response = None
+                        raw_chunks = self._replay_stream(cached.stream_chunks())
+                    else:
+                        response, first_chunk = await self._open_stream(
+                            session, headers, request_body, started_at, trace
+                        )
+                        raw_chunks = self._iter_stream(response, first_chunk)
+                    try:
+                        stream_started_at = time.perf_counter()
+                        async for raw_chunk in raw_chunks:
+                            if recorded is not None:
+                                recorded.append(raw_chunk)
+                            for data in decoder.feed(raw_chunk):
+                                content = accumulator.feed(data)
+                                if content:
+                                    trace.first_token()
+                                    yield content
+                            if self.__speculative_tools:
+                                self._start_speculative_tools(accumulator, speculative, trace)
+                            if accumulator.done:
                                 break
-                            chunk = json.loads(data)
-                            delta = chunk.get("choices", [])[0].get("delta", {})
-
-                            content = delta.get('content', '')
-                            if content:
-                                contents.append(content)
-                                yield content
-
-                            for tool_call in delta.get('tool_calls') or []:
-                                index = tool_call.get('index')
-
-                                if index not in final_tool_calls:
-                                    final_tool_calls[index] = tool_call
-                                    final_tool_calls[index].setdefault("function", {}).setdefault("arguments", "")
-                                final_tool_calls[index]["function"]["arguments"] += tool_call.get('function', {}).get(
-                                    'arguments', '')
-                    ai_response = Message(role=Role.AI, content=''.join(contents),
-                                          tool_calls=list(final_tool_calls.values()))
-                    messages.append(ai_response)
-                    if final_tool_calls:
-                        tool_messages = self._process_tool_calls(list(final_tool_calls.values()))
-                        messages.extend(tool_messages)
-                        async for chunk in self.stream_completion_gen(messages):
-                            yield chunk
+                        else:
+                            for data in decoder.flush():
+                                content = accumulator.feed(data)
+                                if content:
+                                    trace.first_token()
+                                    yield content
+                        trace.record("stream", stream_started_at)
+                    finally:
+                        if response is not None:
+                            response.release()
+
+                    tool_calls = accumulator.tool_calls
+                    # A stream closed before `[DONE]` or `finish_reason` may be cut short, it is not cached
+                    if recorded is not None and (accumulator.done or accumulator.finish_reason):
+                        self._cache_store(cache_key, accumulator.content, tool_calls, recorded)
+                    if not tool_calls or force_answer:
+                        yield Message(role=Role.AI, content=accumulator.content)
+                        reason = TerminationReason.MAX_TOOL_ROUNDS if force_answer else TerminationReason.COMPLETED
+                        yield TurnEnd(reason, tool_rounds, time.monotonic() - started_at)
                         return
-                    yield ai_response
-                else:
-                    raise Exception(f"HTTP {response.status}: {await response.text()}")
 
-    def _process_tool_calls(self, tool_calls: list[dict[str, Any]]) -> list[Message]:
-        """Process tool calls and add results to messages."""
-        tool_messages = []
-        for tool_call in tool_calls:
-            #TODO:
-            # 1. Get `id` from `tool_call` and assign to `tool_call_id` variable
-            # 2. Get `function` from `tool_call` and assign to `function` variable
-            # 3. Get `name` from `function` and assign to `function_name` variable
-            # 4. Get `arguments` from `function` as json (json.loads) and assign to `arguments` variable
-            # 5. Call `_call_tool` with `function_name` and `arguments`, and assign to `tool_execution_result` variable
-            # 6. Append to `tool_messages` Message with:
-            #       - role=Role.TOOL
-            #       - name=function_name
-            #       - tool_call_id=tool_call_id
-            #       - content=tool_execution_result
-            # 7. print(f"FUNCTION '{function_name}'\n{tool_execution_result}\n{'-'*50}")
-            # 8. Return `tool_messages`
-            # -----
-            # FYI: It is important to provide `tool_call_id` in TOOL Message. By `tool_call_id` LLM make a  relation
-            #      between Assistant message `tool_calls[i][id]` and message in history.
-            #      In case if no Tool message presented in history (no message at all or with different tool_call_id),
-            #      then LLM with answer with Error (that not find tool message with specified id).
-            tool_call_id = tool_call.get("id")
-            function = tool_call.get("function", {})
-            function_name = function.get("name")
-            arguments_json = function.get("arguments", "{}")
-            arguments = json.loads(arguments_json)
-            tool_execution_result = self._call_tool(function_name, arguments)
-            tool_messages.append(
-                Message(
-                    role=Role.TOOL,
-                    name=function_name,
-                    tool_call_id=tool_call_id,
-                    content=tool_execution_result
-                )
+                    if on_round_end is not None:
+                        await on_round_end()
+                    # Every call returns a result within the budget, the round is added to history even if the
+                    # budget runs out, so the model sees writes that may have happened
+                    tool_messages = await self._aprocess_tool_calls(
+                        tool_calls, trace, speculative, self._remaining_budget(started_at)
+                    )
+                except TimeoutError:
+                    # Only the turn budget ends the turn quietly, upstream timeouts left after retries are errors
+                    if self._remaining_budget(started_at) != 0:
+                        raise
+                    reason = TerminationReason.TIMEOUT
+                    yield TurnEnd(reason, tool_rounds, time.monotonic() - started_at)
+                    return
+                finally:
+                    # Speculative tools of a round that failed, timed out or was abandoned by the caller
+                    for task in speculative.values():
+                        task.cancel()
+
+                # Assistant message and its tool results are added together, so history never has unanswered tool calls
+                messages.append(Message(role=Role.AI, content=accumulator.content, tool_calls=tool_calls))
+                messages.extend(tool_messages)
+                tool_rounds += 1
+                trace.tool_round = tool_rounds
+        finally:
+            trace.end(reason=reason)
+
+    async def _open_stream(
+            self,
+            session: "aiohttp.ClientSession",
+            headers: dict[str, str],
+            request_body: bytes,
+            started_at: float,
+            trace: TurnTrace
+    ) -> "tuple[aiohttp.ClientResponse, bytes]":
+        """
+        Starts streaming request and waits for its first chunk, retrying failed or stalled attempts while
+        the turn budget allows. Nothing has been yielded to the caller yet, so a retry is invisible to it.
+        """
+        attempt = 0
+        while True:
+            try:
+                return await self._hedged_stream_attempt(session, headers, request_body, started_at, trace)
+            except Exception as e:
+                delay = self._retry_delay(attempt, e, getattr(e, "deployment", None))
+                remaining = self._remaining_budget(started_at)
+                if delay is None or (remaining is not None and delay >= remaining):
+                    raise
+                error = str(e) or type(e).__name__
+                print(f"Request failed ({error}), retrying in {delay:.2f}s")
+                trace.record("retry", time.perf_counter(), duration=delay, attempt=attempt, error=error)
+                await asyncio.sleep(delay)
+                attempt += 1
+
+    def _retry_delay(self, attempt: int, error: BaseException, deployment: Deployment | None) -> float | None:
+        """Retry policy delay, or no delay when another healthy deployment can take the retry right away"""
+        delay = self.__retry.delay(attempt, error)
+        if delay is not None and deployment is not None and self.__deployments.has_healthy(exclude=deployment):
+            return 0.0
+        return delay
+
+    async def _hedged_stream_attempt(
+            self,
+            session: "aiohttp.ClientSession",
+            headers: dict[str, str],
+            request_body: bytes,
+            started_at: float,
+            trace: TurnTrace
+    ) -> "tuple[aiohttp.ClientResponse, bytes]":
+        """One attempt, or with `hedge` two racing attempts when the first one is slower than the hedge delay"""
+        def attempt() -> asyncio.Task:
+            return asyncio.create_task(self._stream_attempt(session, headers, request_body, started_at, trace))
+
+        if self.__hedge is None:
+            return await self._stream_attempt(session, headers, request_body, started_at, trace)
+
+        hedge_delay = self.__hedge.delay()
+        tasks = {attempt()}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=hedge_delay)
+            if not done:
+                trace.record("hedge", time.perf_counter(), duration=0.0, delay=hedge_delay)
+                tasks.add(attempt())
+            error = None
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                winners = [task for task in done if task.exception() is None]
+                for extra in winners[1:]:
+                    extra.result()[0].close()
+                if winners:
+                    return winners[0].result()
+                error = next(iter(done)).exception()
+            raise error
+        finally:
+            # Loser (or both attempts when the caller is cancelled) is cancelled, its response is closed by the attempt
+            for task in tasks:
+                task.cancel()
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _stream_attempt(
+            self,
+            session: "aiohttp.ClientSession",
+            headers: dict[str, str],
+            request_body: bytes,
+            started_at: float,
+            trace: TurnTrace
+    ) -> "tuple[aiohttp.ClientResponse, bytes]":
+        """
+        Sends streaming request to the deployment picked by the pool, returns open response and its first chunk.
+        Failed attempt's error gets `deployment` attribute, so the retry can go elsewhere without waiting.
+        """
+        import aiohttp
+
+        request_started_at = time.perf_counter()
+        deployment = self.__deployments.acquire()
+        response = None
+
+        async def read_first_chunk() -> bytes:
+            nonlocal response
+            response = await session.post(
+                url=deployment.url,
+                headers=headers,
+                data=request_body,
+                timeout=aiohttp.ClientTimeout(
+                    total=self._remaining_budget(started_at),
+                    sock_connect=self.__connect_timeout,
+                    sock_read=self.__read_timeout
+                ),
+                trace_request_ctx=trace
             )
-            print(f"FUNCTION '{function_name}'\n{tool_execution_result}\n{'-'*50}")
+            trace.record("ttfb", request_started_at, status=response.status, deployment=deployment.name)
+            if response.status != 200:
+                raise HTTPStatusError(response.status, await response.text(), response.headers.get("Retry-After"))
+            return await response.content.readany()
+
+        try:
+            # Upstream may hold back headers until the first token, so the timeout covers both
+            first_chunk = await asyncio.wait_for(read_first_chunk(), self.__first_token_timeout)
+        except asyncio.CancelledError:
+            self.__deployments.release(deployment)
+            if response is not None:
+                response.close()
+            raise
+        except Exception as e:
+            self.__deployments.release(deployment, error=e)
+            e.deployment = deployment
+            if response is not None:
+                response.close()
+            raise
+        ttft = time.perf_counter() - request_started_at
+        self.__deployments.release(deployment, ttft=ttft)
+        if self.__hedge is not None:
+            self.__hedge.latencies.add(ttft)
+        return response, first_chunk
+
+    @staticmethod
+    async def _replay_stream(chunks: list[bytes]) -> AsyncIterator[bytes]:
+        for chunk in chunks:
+            yield chunk
 
-            return tool_messages
+    @staticmethod
+    async def _iter_stream(response: "aiohttp.ClientResponse", first_chunk: bytes) -> AsyncIterator[bytes]:
+        yield first_chunk
+        async for raw_chunk in response.content.iter_any():
+            yield raw_chunk
 
+    def _request_body(
+            self,
+            messages: list[Message],
+            stream: bool,
+            force_answer: bool = False,
+            attributes: dict[str, Any] | None = None
+    ) -> bytes:
+        """
+        Builds JSON request body from cached per-message fragments (see `Message.to_json`) and pre-encoded tools,
+        so only messages added since the previous call are encoded. History is fitted into `context_window` if set.
+        Tools are narrowed down by `tool_router` if set, number of sent tools is added to span `attributes`.
+        """
+        tools_json = self.__tools_json
+        tools_count = len(self.__tools_dict)
+        if self.__tool_router:
+            names = self.__tool_router.select(messages, self.__tools_dict)
+            if names is not None:
+                tools_json = self.__tools_dict.subset_json(names)
+                tools_count = len(names)
+        if attributes is not None:
+            attributes["tools"] = tools_count
+        if self.__context_window:
+            messages = self.__context_window.fit(messages)
+        parts = [b'{"messages":[', b",".join(msg.to_json() for msg in messages), b'],"tools":', tools_json]
+        if force_answer and tools_count:
+            parts.append(b',"tool_choice":"none"')
+        # Stream flag goes last, `CompletionCache.key` drops it
+        parts.append(b',"stream":true}' if stream else b"}")
+        return b"".join(parts)
+
+    def _cache_lookup(
+            self,
+            request_body: bytes,
+            attributes: dict[str, Any]
+    ) -> "tuple[str | None, CachedCompletion | None]":
+        """Completion cache key of the request (`None` without cache) and cached answer, if any"""
+        if self.__completion_cache is None:
+            return None, None
+        cache_key = self.__completion_cache.key(self.__cache_scope, request_body)
+        cached = self.__completion_cache.get(cache_key)
+        attributes["cache"] = "miss" if cached is None else "hit"
+        return cache_key, cached
+
+    def _cache_store(
+            self,
+            cache_key: str,
+            content: str,
+            tool_calls: list[dict[str, Any]] | None,
+            chunks: list[bytes] | None = None
+    ) -> None:
+        """
+        Caches the answer. Tool calls are cached only if all called tools are read-only, replaying a call of
+        a tool with side effects (e.g. `add_user`) would repeat them without the model deciding to.
+        """
+        from task.completion_cache import CachedCompletion
+
+        for tool_call in tool_calls or []:
+            tool = self.__tools_dict.get(tool_call.get("function", {}).get("name"))
+            if tool is None or not tool.read_only:
+                return
+        if not content and not tool_calls:
+            return
+        self.__completion_cache.put(cache_key, CachedCompletion(content or "", tool_calls or None, chunks))
+
+    def _remaining_budget(self, started_at: float) -> float | None:
+        """Seconds left from the per-turn budget, `None` if turn is not limited"""
+        if self.__turn_timeout is None:
+            return None
+        return max(0.0, started_at + self.__turn_timeout - time.monotonic())
+
+    def _process_tool_calls(
+            self,
+            tool_calls: list[dict[str, Any]],
+            trace: TurnTrace | None = None,
+            timeout: float | None = None
+    ) -> list[Message]:
+        """
+        Process tool calls concurrently in the tool pool, results are returned in `tool_calls` order.
+        Each call waits at most its tool timeout and no call waits longer than `timeout` (the turn budget left).
+        """
+        #TODO:
+        # 1. Get `id` from `tool_call` and assign to `tool_call_id` variable
+        # 2. Get `function` from `tool_call` and assign to `function` variable
+        # 3. Get `name` from `function` and assign to `function_name` variable
+        # 4. Get `arguments` from `function` as json (json.loads) and assign to `arguments` variable
+        # 5. Call `_call_tool` with `function_name` and `arguments`, and assign to `tool_execution_result` variable
+        # 6. Append to `tool_messages` Message with:
+        #       - role=Role.TOOL
+        #       - name=function_name
+        #       - tool_call_id=tool_call_id
+        #       - content=tool_execution_result
+        # 7. print(f"FUNCTION '{function_name}'\n{tool_execution_result}\n{'-'*50}")
+        # 8. Return `tool_messages`
+        # -----
+        # FYI: It is important to provide `tool_call_id` in TOOL Message. By `tool_call_id` LLM make a  relation
+        #      between Assistant message `tool_calls[i][id]` and message in history.
+        #      In case if no Tool message presented in history (no message at all or with different tool_call_id),
+        #      then LLM with answer with Error (that not find tool message with specified id).
+        parsed_calls = [self._parse_tool_call(tool_call) for tool_call in tool_calls]
+        started_at = time.monotonic()
+        started_at_perf = time.perf_counter()
+        futures = [
+            self.__tool_executor.submit(self._call_tool_timed, function_name, arguments)
+            for _, function_name, arguments in parsed_calls
+        ]
+        tool_messages = []
+        for (tool_call_id, function_name, _), future in zip(parsed_calls, futures):
+            status = "ok"
+            duration = None
+            tool_timeout = self._tool_timeout(function_name)
+            budget_limited = timeout is not None and (tool_timeout is None or timeout < tool_timeout)
+            limit = timeout if budget_limited else tool_timeout
+            remaining = None if limit is None else max(0.0, started_at + limit - time.monotonic())
+            try:
+                tool_execution_result, duration = future.result(timeout=remaining)
+            except TimeoutError:
+                # A call still queued in the pool is cancelled. A running worker thread can't be interrupted,
+                # it finishes in background and its result is dropped
+                started = not future.cancel()
+                tool_execution_result = self._timeout_result(function_name, started, budget_limited)
+                status = "timeout"
+            except Exception as e:
+                tool_execution_result = f"Error while executing '{function_name}': {str(e)}"
+                status = "error"
+            if trace:
+                trace.record("tool", started_at_perf, duration=duration, tool=function_name, status=status)
+            tool_messages.append(self._tool_message(tool_call_id, function_name, tool_execution_result))
         return tool_messages
 
-    def _call_tool(self, function_name: str, arguments: dict[str, Any]) -> str:
+    async def _aprocess_tool_calls(
+            self,
+            tool_calls: list[dict[str, Any]],
+            trace: TurnTrace | None = None,
+            started: dict[str, asyncio.Task] | None = None,
+            timeout: float | None = None
+    ) -> list[Message]:
+        """
+        Async version of `_process_tool_calls`, tools are awaited concurrently via `BaseTool.execute_async`.
+        Calls already running in `started` (by tool call id) are awaited instead of being called again.
+        No call waits longer than `timeout` (the turn budget left).
+        """
+        started = started or {}
+        parsed_calls = [self._parse_tool_call(tool_call) for tool_call in tool_calls]
+        results = await asyncio.gather(*(
+            self._await_started_tool(function_name, started[tool_call_id], timeout) if tool_call_id in started
+            else self._acall_tool(function_name, arguments, trace, budget=timeout)
+            for tool_call_id, function_name, arguments in parsed_calls
+        ))
+        return [
+            self._tool_message(tool_call_id, function_name, tool_execution_result)
+            for (tool_call_id, function_name, _), tool_execution_result in zip(parsed_calls, results)
+        ]
+
+    @staticmethod
+    def _parse_tool_call(tool_call: dict[str, Any]) -> tuple[str, str, dict[str, Any] | None]:
+        """Tool call id, function name and arguments, `None` if arguments aren't a JSON object"""
+        tool_call_id = tool_call.get("id")
+        function = tool_call.get("function", {})
+        function_name = function.get("name")
+        arguments_json = function.get("arguments") or "{}"
+        try:
+            arguments = json.loads(arguments_json)
+        except ValueError:
+            return tool_call_id, function_name, None
+        return tool_call_id, function_name, arguments if isinstance(arguments, dict) else None
+
+    @staticmethod
+    def _invalid_arguments_result(function_name: str) -> str:
+        return f"Error: arguments of '{function_name}' are not a valid JSON object, call it again with valid arguments"
+
+    @staticmethod
+    def _tool_message(tool_call_id: str, function_name: str, tool_execution_result: str) -> Message:
+        print(f"FUNCTION '{function_name}'\n{tool_execution_result}\n{'-'*50}")
+        return Message(
+            role=Role.TOOL,
+            name=function_name,
+            tool_call_id=tool_call_id,
+            content=tool_execution_result
+        )
+
+    def _tool_timeout(self, function_name: str) -> float | None:
+        tool = self.__tools_dict.get(function_name)
+        if tool and tool.timeout is not None:
+            return tool.timeout
+        return self.__tool_timeout
+
+    def _timeout_result(self, function_name: str, started: bool = True, budget_exhausted: bool = False) -> str:
+        """
+        Result of a timed out call, `budget_exhausted` if it was stopped by the turn budget, not the tool timeout.
+        A started call of a tool with side effects may still complete, so the model is told its outcome is unknown
+        instead of failed, otherwise it would retry and e.g. add the user twice.
+        """
+        if budget_exhausted:
+            cause = "turn time budget exhausted"
+        else:
+            cause = f"timed out after {self._tool_timeout(function_name):.3g} seconds"
+        tool = self.__tools_dict.get(function_name)
+        if started and tool is not None and not tool.read_only:
+            return (
+                f"Error: function '{function_name}' didn't finish ({cause}), its outcome is unknown. "
+                f"It may still complete, check the current state before calling it again"
+            )
+        if budget_exhausted:
+            return f"Error: function '{function_name}' was stopped, {cause}"
+        return f"Error: function '{function_name}' {cause}"
+
+    def _call_tool(self, function_name: str, arguments: dict[str, Any] | None) -> str:
         #TODO:
         # Get tool from `__tools_dict`, id present then return executed result, otherwise return `f"Unknown function: {function_name}"`
         tool = self.__tools_dict.get(function_name)
         if tool:
+            if arguments is None:
+                return self._invalid_arguments_result(function_name)
             return tool.execute(arguments)
         else:
             return f"Unknown function: {function_name}"
+
+    def _call_tool_timed(self, function_name: str, arguments: dict[str, Any] | None) -> tuple[str, float]:
+        started_at = time.perf_counter()
+        return self._call_tool(function_name, arguments), time.perf_counter() - started_at
+
+    def _start_speculative_tools(
+            self,
+            accumulator: ChatStreamAccumulator,
+            started: dict[str, asyncio.Task],
+            trace: TurnTrace
+    ) -> None:
+        """Starts read-only tools whose call arguments are complete, the rest waits for the end of the stream"""
+        for tool_call in accumulator.pop_completed_tool_calls():
+            tool = self.__tools_dict.get(tool_call.get("function", {}).get("name"))
+            if not tool or not tool.read_only or not tool_call.get("id"):
+                continue
+            tool_call_id, function_name, arguments = self._parse_tool_call(tool_call)
+            if arguments is None:
+                # Reported to the model when the call is processed after the stream
+                continue
+            started[tool_call_id] = asyncio.create_task(
+                self._acall_tool(function_name, arguments, trace, speculative=True)
+            )
+
+    async def _acall_tool(
+            self,
+            function_name: str,
+            arguments: dict[str, Any] | None,
+            trace: TurnTrace | None = None,
+            speculative: bool = False,
+            budget: float | None = None
+    ) -> str:
+        """Awaits the tool for at most its timeout, or `budget` (the turn budget left) if that is shorter"""
+        tool = self.__tools_dict.get(function_name)
+        if not tool:
+            return f"Unknown function: {function_name}"
+        if arguments is None:
+            return self._invalid_arguments_result(function_name)
+        tool_timeout = self._tool_timeout(function_name)
+        budget_limited = budget is not None and (tool_timeout is None or budget < tool_timeout)
+        started_at = time.perf_counter()
+        status = "ok"
+        try:
+            return await asyncio.wait_for(
+                tool.execute_async(arguments, self.__tool_executor),
+                timeout=budget if budget_limited else tool_timeout
+            )
+        except TimeoutError:
+            status = "timeout"
+            return self._timeout_result(function_name, budget_exhausted=budget_limited)
+        except Exception as e:
+            status = "error"
+            return f"Error while executing '{function_name}': {str(e)}"
+        finally:
+            if trace:
+                trace.record("tool", started_at, tool=function_name, status=status, speculative=speculative)
+
+    async def _await_started_tool(self, function_name: str, task: asyncio.Task, budget: float | None) -> str:
+        """Awaits a speculatively started (read-only) call for at most `budget`, the call is cancelled after it"""
+        try:
+            return await asyncio.wait_for(task, timeout=budget)
+        except TimeoutError:
+            return self._timeout_result(function_name, budget_exhausted=True)
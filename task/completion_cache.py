@@ -0,0 +1,121 @@
+import base64
+import hashlib
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any
+
+from task import json_codec
+from task.cache import CacheStats, TTLCache
+
+# `_request_body` adds the stream flag last, without it regular and streaming requests share entries
+_STREAM_SUFFIX = b',"stream":true}'
+
+
+@dataclass
+class CachedCompletion:
+    """Assistant answer of one completion request and, if it was streamed, the raw response chunks"""
+    content: str
+    tool_calls: list[dict[str, Any]] | None = None
+    chunks: list[bytes] | None = None
+
+    def stream_chunks(self) -> list[bytes]:
+        """Raw SSE chunks to replay, a single chunk is made up for answers cached in regular mode"""
+        if self.chunks is not None:
+            return self.chunks
+        delta: dict[str, Any] = {"role": "assistant", "content": self.content}
+        if self.tool_calls:
+            delta["tool_calls"] = [{"index": i, **tool_call} for i, tool_call in enumerate(self.tool_calls)]
+        finish_reason = "tool_calls" if self.tool_calls else "stop"
+        data = json_codec.dumps({"choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]})
+        return [b"data: " + data + b"\n\ndata: [DONE]\n\n"]
+
+    def to_json(self) -> bytes:
+        return json_codec.dumps({
+            "content": self.content,
+            "tool_calls": self.tool_calls,
+            "chunks": None if self.chunks is None else [base64.b64encode(c).decode("ascii") for c in self.chunks]
+        })
+
+    @classmethod
+    def from_json(cls, payload: bytes) -> "CachedCompletion":
+        data = json_codec.loads(payload)
+        chunks = data.get("chunks")
+        return cls(
+            content=data.get("content") or "",
+            tool_calls=data.get("tool_calls"),
+            chunks=None if chunks is None else [base64.b64decode(c) for c in chunks]
+        )
+
+
+class CompletionCache:
+    """
+    Exact match cache of completion responses: in-memory LRU in front of a SQLite file (`path`, `:memory:` keeps
+    everything in memory). The key is a hash of the deployment and the request body, which is built from canonical
+    message and tool encodings, so any difference in history, tools or tool results is a miss.
+    Entries expire after `ttl` seconds, `None` keeps them forever.
+    """
+
+    def __init__(self, path: str = ":memory:", max_size: int = 256, ttl: float | None = 24 * 3600.0):
+        self.__memory = TTLCache(max_size=max_size, ttl=ttl)
+        self.__ttl = ttl
+        self.__connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.__lock = threading.Lock()
+        with self.__lock:
+            self.__connection.execute("PRAGMA journal_mode=WAL")
+            self.__connection.execute("PRAGMA synchronous=NORMAL")
+            self.__connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS completions (
+                    key TEXT PRIMARY KEY,
+                    created_at REAL NOT NULL,
+                    payload BLOB NOT NULL
+                ) WITHOUT ROWID
+                """
+            )
+            if ttl is not None:
+                self.__connection.execute("DELETE FROM completions WHERE created_at < ?", (time.time() - ttl,))
+
+    @property
+    def stats(self) -> CacheStats:
+        """Hits and misses of the in-memory tier"""
+        return self.__memory.stats
+
+    @staticmethod
+    def key(deployment: str, request_body: bytes) -> str:
+        if request_body.endswith(_STREAM_SUFFIX):
+            request_body = request_body[:-len(_STREAM_SUFFIX)] + b"}"
+        digest = hashlib.sha256(deployment.encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(request_body)
+        return digest.hexdigest()
+
+    def get(self, key: str) -> CachedCompletion | None:
+        completion = self.__memory.get(key)
+        if completion is not None:
+            return completion
+        with self.__lock:
+            row = self.__connection.execute(
+                "SELECT created_at, payload FROM completions WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        created_at, payload = row
+        remaining = None if self.__ttl is None else created_at + self.__ttl - time.time()
+        if remaining is not None and remaining <= 0:
+            return None
+        completion = CachedCompletion.from_json(payload)
+        self.__memory.put(key, completion, ttl=remaining)
+        return completion
+
+    def put(self, key: str, completion: CachedCompletion) -> None:
+        self.__memory.put(key, completion)
+        with self.__lock:
+            self.__connection.execute(
+                "INSERT OR REPLACE INTO completions VALUES (?, ?, ?)", (key, time.time(), completion.to_json())
+            )
+
+    def close(self) -> None:
+        with self.__lock:
+            self.__connection.close()
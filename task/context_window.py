@@ -0,0 +1,110 @@
+from task.cache import TTLCache
+from task.models.message import Message
+from task.models.role import Role
+
+COMPACTED_MARKER = "\n...[truncated to fit context window]"
+
+
+class ContextWindow:
+    """
+    Fits message history into a token budget before it is sent to the model.
+
+    Leading system messages and the latest user turn are always kept. To make room, tool results of older turns are
+    compacted first, then the oldest turns are dropped. An assistant message with `tool_calls` and the tool messages
+    answering it are kept or dropped together, so a `tool` message is never left without its tool call.
+    """
+
+    def __init__(
+            self,
+            max_tokens: int,
+            reserved_tokens: int = 0,
+            compact_tool_result_tokens: int | None = 500,
+            compacted_cache_size: int = 1024
+    ):
+        """
+        :param max_tokens: model context size
+        :param reserved_tokens: tokens kept free for the completion (and tools schemas)
+        :param compact_tool_result_tokens: older tool results above this size are truncated to it, `None` to disable
+        :param compacted_cache_size: truncated copies kept for reuse, so next requests don't encode them again
+        """
+        if max_tokens <= reserved_tokens:
+            raise ValueError("max_tokens must be greater than reserved_tokens")
+        self.__budget = max_tokens - reserved_tokens
+        self.__compact_tool_result_tokens = compact_tool_result_tokens
+        # id(message) -> (message, its encoding, truncated copy). Source message is kept, so its id isn't reused
+        # while the entry lives, and the encoding tells whether its fields were reassigned since
+        self.__compacted = TTLCache(max_size=compacted_cache_size)
+
+    @property
+    def budget(self) -> int:
+        return self.__budget
+
+    def fit(self, messages: list[Message]) -> list[Message]:
+        """Returns messages that fit the budget, `messages` itself is not modified"""
+        # Estimates are lengths of cached message JSON, summing them is cheap next to building the request body
+        total = sum(msg.estimate_tokens() for msg in messages)
+        if total <= self.__budget:
+            return messages
+
+        head_size = 0
+        while head_size < len(messages) and messages[head_size].role == Role.SYSTEM:
+            head_size += 1
+        head = messages[:head_size]
+        turns = self.__split_turns(messages[head_size:])
+
+        # 1. Compact big tool results of all turns except the latest one
+        for turn in turns[:-1]:
+            for unit in turn:
+                for i, msg in enumerate(unit):
+                    compacted = self.__compact(msg)
+                    if compacted is not msg:
+                        total += compacted.estimate_tokens() - msg.estimate_tokens()
+                        unit[i] = compacted
+        # 2. Drop the oldest turns
+        while total > self.__budget and len(turns) > 1:
+            total -= self.__turn_tokens(turns.pop(0))
+        # 3. Drop the oldest tool call rounds of the latest turn, its first message (user request) is kept
+        latest_turn = turns[-1] if turns else []
+        while total > self.__budget and len(latest_turn) > 2:
+            total -= sum(msg.estimate_tokens() for msg in latest_turn.pop(1))
+
+        if total > self.__budget:
+            print(f"Context window: {total} tokens left after trimming, budget is {self.__budget}")
+        return head + [msg for turn in turns for unit in turn for msg in unit]
+
+    @staticmethod
+    def __split_turns(messages: list[Message]) -> list[list[list[Message]]]:
+        """
+        Splits history into turns (each starts with user message), turns into units. Unit is a single message
+        or assistant message with `tool_calls` followed by its tool messages.
+        """
+        turns = []
+        for msg in messages:
+            if msg.role == Role.USER or not turns:
+                turns.append([])
+            turn = turns[-1]
+            if msg.role == Role.TOOL and turn and turn[-1][0].tool_calls:
+                turn[-1].append(msg)
+            else:
+                turn.append([msg])
+        return turns
+
+    def __compact(self, message: Message) -> Message:
+        limit = self.__compact_tool_result_tokens
+        if limit is None or message.role != Role.TOOL or message.estimate_tokens() <= limit:
+            return message
+        cached = self.__compacted.get(id(message))
+        if cached is not None and cached[0] is message and cached[1] is message.to_json():
+            return cached[2]
+        compacted = Message(
+            role=message.role,
+            content=message.content[:limit * 4] + COMPACTED_MARKER,
+            tool_call_id=message.tool_call_id,
+            name=message.name,
+        )
+        self.__compacted.put(id(message), (message, message.to_json(), compacted))
+        return compacted
+
+    @staticmethod
+    def __turn_tokens(turn: list[list[Message]]) -> int:
+        return sum(msg.estimate_tokens() for unit in turn for msg in unit)
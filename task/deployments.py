@@ -0,0 +1,151 @@
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any
+from urllib.parse import urlsplit
+
+from task.retry import HTTPStatusError, parse_retry_after
+
+
+@dataclass(frozen=True)
+class Deployment:
+    """DIAL deployment (model) behind `endpoint`"""
+    name: str
+    endpoint: str
+
+    @property
+    def url(self) -> str:
+        return f"{self.endpoint}/openai/deployments/{self.name}/chat/completions"
+
+    @property
+    def origin(self) -> str:
+        parts = urlsplit(self.endpoint)
+        return f"{parts.scheme}://{parts.netloc}/"
+
+
+class _DeploymentStats:
+
+    def __init__(self):
+        self.ttft: float | None = None
+        self.error_rate = 0.0
+        self.consecutive_failures = 0
+        self.in_flight = 0
+        self.ejected_until = 0.0
+
+    def available(self, now: float) -> bool:
+        if self.ejected_until > now:
+            return False
+        # Back from ejection and not succeeded yet: one probe at a time
+        return not (self.ejected_until and self.in_flight)
+
+
+class DeploymentPool:
+    """
+    Routes requests between interchangeable deployments. Each one has EWMA of time to first token (time to response
+    in regular mode) and of error rate. A request goes to the deployment with the lowest expected wait
+    `ttft * (1 + in_flight) / (1 - error_rate)`, so traffic moves away from a deployment as soon as it slows down
+    or piles up requests. Deployments without samples yet count as fast as the fastest one, so they get probed.
+    After `eject_after` failures in a row, or on 429/503, a deployment is ejected for `Retry-After` or `eject_seconds`.
+    When it is back, it takes one probe request at a time until a success; a failure ejects it again.
+    If all deployments are ejected, the one coming back first is used.
+    """
+
+    def __init__(
+            self,
+            deployments: list[Deployment],
+            alpha: float = 0.3,
+            eject_after: int = 3,
+            eject_seconds: float = 30.0,
+    ):
+        if not deployments:
+            raise ValueError("At least one deployment is required")
+        self.__deployments = list(deployments)
+        self.__stats = {deployment: _DeploymentStats() for deployment in self.__deployments}
+        self.__alpha = alpha
+        self.__eject_after = eject_after
+        self.__eject_seconds = eject_seconds
+        self.__lock = threading.Lock()
+
+    @classmethod
+    def single(cls, name: str, endpoint: str) -> "DeploymentPool":
+        return cls([Deployment(name, endpoint)])
+
+    @property
+    def deployments(self) -> list[Deployment]:
+        return self.__deployments
+
+    def __len__(self) -> int:
+        return len(self.__deployments)
+
+    @staticmethod
+    def __expected_wait(stats: _DeploymentStats, unknown_ttft: float) -> tuple[float, bool]:
+        """Sort key, deployments without samples win ties"""
+        ttft = unknown_ttft if stats.ttft is None else stats.ttft
+        return ttft * (1 + stats.in_flight) / max(0.05, 1.0 - stats.error_rate), stats.ttft is not None
+
+    def acquire(self) -> Deployment:
+        """Picks deployment for the next request, must be followed by `release`"""
+        now = time.monotonic()
+        with self.__lock:
+            healthy = [d for d in self.__deployments if self.__stats[d].available(now)]
+            if healthy:
+                unknown_ttft = min((s.ttft for s in self.__stats.values() if s.ttft is not None), default=1.0)
+                deployment = min(healthy, key=lambda d: self.__expected_wait(self.__stats[d], unknown_ttft))
+            else:
+                deployment = min(self.__deployments, key=lambda d: self.__stats[d].ejected_until)
+            self.__stats[deployment].in_flight += 1
+        return deployment
+
+    def release(self, deployment: Deployment, ttft: float | None = None, error: BaseException | None = None) -> None:
+        """
+        Finishes request started by `acquire`: `ttft` of a successful request or the `error` it failed with.
+        Neither is given for abandoned requests (e.g. the losing hedged request), they don't change the stats.
+        """
+        with self.__lock:
+            stats = self.__stats[deployment]
+            stats.in_flight -= 1
+            if ttft is not None:
+                stats.ttft = ttft if stats.ttft is None else stats.ttft + self.__alpha * (ttft - stats.ttft)
+                stats.error_rate -= self.__alpha * stats.error_rate
+                stats.consecutive_failures = 0
+                stats.ejected_until = 0.0
+            elif error is not None and self.__is_deployment_failure(error):
+                stats.error_rate += self.__alpha * (1.0 - stats.error_rate)
+                stats.consecutive_failures += 1
+                eject_for = None
+                if isinstance(error, HTTPStatusError) and error.status in (429, 503):
+                    # Saturated: its Retry-After tells for how long
+                    eject_for = min(self.__eject_seconds, parse_retry_after(error.retry_after) or self.__eject_seconds)
+                elif stats.consecutive_failures >= self.__eject_after or stats.ejected_until:
+                    eject_for = self.__eject_seconds
+                if eject_for is not None:
+                    stats.ejected_until = time.monotonic() + eject_for
+                    print(f"Deployment {deployment.name} is ejected for {eject_for:.1f}s: {error}")
+
+    @staticmethod
+    def __is_deployment_failure(error: BaseException) -> bool:
+        """Bad requests (4xx) are caller's fault and say nothing about deployment health"""
+        if isinstance(error, HTTPStatusError):
+            return error.status >= 500 or error.status in (408, 429)
+        return True
+
+    def has_healthy(self, exclude: Deployment | None = None) -> bool:
+        """Whether any deployment (other than `exclude`) can take a request right now"""
+        now = time.monotonic()
+        with self.__lock:
+            return any(d != exclude and self.__stats[d].available(now) for d in self.__deployments)
+
+    def stats(self) -> list[dict[str, Any]]:
+        now = time.monotonic()
+        with self.__lock:
+            return [
+                {
+                    "deployment": deployment.name,
+                    "endpoint": deployment.endpoint,
+                    "ttft": None if stats.ttft is None else round(stats.ttft, 3),
+                    "error_rate": round(stats.error_rate, 3),
+                    "in_flight": stats.in_flight,
+                    "ejected_for": round(max(0.0, stats.ejected_until - now), 1),
+                }
+                for deployment, stats in self.__stats.items()
+            ]
@@ -0,0 +1,123 @@
+import atexit
+import os
+from functools import cache
+from typing import Any
+
+from task.cache import TTLCache
+from task.cassette import RECORD, REPLAY, Cassette
+from task.client import DialClient
+from task.completion_cache import CompletionCache
+from task.context_window import ContextWindow
+from task.deployments import Deployment, DeploymentPool
+from task.instrumentation import JsonLinesTracer
+from task.tools.base import BaseTool
+from task.tools.router import KeywordToolRouter
+from task.tools.users.bulk_create_users_tool import BulkCreateUsersTool
+from task.tools.users.bulk_delete_users_tool import BulkDeleteUsersTool
+from task.tools.users.bulk_update_users_tool import BulkUpdateUsersTool
+from task.tools.users.cache import UserCache
+from task.tools.users.create_user_tool import CreateUserTool
+from task.tools.users.delete_user_tool import DeleteUserTool
+from task.tools.users.get_user_by_id_tool import GetUserByIdTool
+from task.tools.users.replica import UserReplica
+from task.tools.users.search_users_tool import SearchUsersTool
+from task.tools.users.update_user_tool import UpdateUserTool
+from task.tools.users.user_client import UserClient
+from task.tools.web_search import WebSearchTool
+
+DIAL_ENDPOINT = "https://ai-proxy.lab.epam.com"
+DEPLOYMENT_NAME = "gpt-4"
+# Optional comma separated interchangeable deployments (`name` or `name@endpoint`) to route requests between
+DEPLOYMENTS = os.getenv('DIAL_DEPLOYMENTS')
+WEB_SEARCH_DEPLOYMENTS = os.getenv('DIAL_WEB_SEARCH_DEPLOYMENTS', 'gemini-2.5-pro')
+API_KEY = os.getenv('DIAL_API_KEY')
+# Optional JSON lines file for per-turn latency spans
+TRACE_FILE = os.getenv('DIAL_TRACE_FILE')
+# Optional SQLite file to persist conversations in (server mode)
+CONVERSATION_DB = os.getenv('DIAL_CONVERSATION_DB')
+# Answer `search_users` from in-process replica of all users (loaded at startup) instead of the user service
+USE_USER_REPLICA = os.getenv('USER_REPLICA', '').lower() in ('1', 'true')
+# Optional SQLite file (or `:memory:`) to cache completions of identical requests in
+COMPLETION_CACHE = os.getenv('DIAL_COMPLETION_CACHE')
+# Optional cassette file to record HTTP traffic of DIAL, web search and user service clients to or to replay it from,
+# `DIAL_CASSETTE_MODE`: `record`, `replay` (as fast as possible) or `replay-realtime` (at recorded speed)
+CASSETTE = os.getenv('DIAL_CASSETTE')
+CASSETTE_MODE = os.getenv('DIAL_CASSETTE_MODE', REPLAY)
+MAX_CONTEXT_TOKENS = 128_000
+RESERVED_TOKENS = 8_000
+
+
+def create_deployment_pool(deployments: str) -> DeploymentPool:
+    """Pool from comma separated `name` or `name@endpoint` entries, `DIAL_ENDPOINT` is the default endpoint"""
+    entries = []
+    for entry in deployments.split(","):
+        name, _, endpoint = entry.strip().partition("@")
+        if name:
+            entries.append(Deployment(name, endpoint or DIAL_ENDPOINT))
+    return DeploymentPool(entries)
+
+
+@cache
+def get_cassette() -> Cassette | None:
+    """Cassette shared by all clients of the process, recorded one is saved on exit"""
+    if not CASSETTE:
+        return None
+    realtime = CASSETTE_MODE == f"{REPLAY}-realtime"
+    cassette = Cassette(CASSETTE, mode=REPLAY if realtime else CASSETTE_MODE, realtime=realtime)
+    if cassette.mode == RECORD:
+        atexit.register(cassette.save)
+    return cassette
+
+
+def create_user_client(**kwargs: Any) -> UserClient:
+    """UserClient with default settings, `kwargs` override UserClient arguments"""
+    return UserClient(**{"cassette": get_cassette(), **kwargs})
+
+
+def create_tools(user_client: UserClient) -> list[BaseTool]:
+    """Agent tools: web search and user service tools sharing one result cache"""
+    user_cache = UserCache()
+    replica = None
+    if USE_USER_REPLICA:
+        replica = UserReplica(user_client)
+        try:
+            replica.load()
+        except Exception as e:
+            print(f"User replica is disabled, can't load users: {e}")
+            replica = None
+    return [
+        WebSearchTool(
+            api_key=API_KEY,
+            endpoint=DIAL_ENDPOINT,
+            cache=TTLCache(max_size=512, ttl=3600),
+            deployments=create_deployment_pool(WEB_SEARCH_DEPLOYMENTS),
+            cassette=get_cassette()
+        ),
+        GetUserByIdTool(user_client, user_cache),
+        SearchUsersTool(user_client, user_cache, replica),
+        CreateUserTool(user_client, user_cache),
+        UpdateUserTool(user_client, user_cache),
+        DeleteUserTool(user_client, user_cache),
+        BulkCreateUsersTool(user_client, user_cache),
+        BulkUpdateUsersTool(user_client, user_cache),
+        BulkDeleteUsersTool(user_client, user_cache)
+    ]
+
+
+def create_dial_client(user_client: UserClient, **kwargs: Any) -> DialClient:
+    """DialClient with all agent tools and default settings, `kwargs` override DialClient arguments"""
+    options = dict(
+        endpoint=DIAL_ENDPOINT,
+        deployment_name=DEPLOYMENT_NAME,
+        deployments=create_deployment_pool(DEPLOYMENTS) if DEPLOYMENTS else None,
+        api_key=API_KEY,
+        tools=create_tools(user_client),
+        warmup_connections=1,
+        context_window=ContextWindow(max_tokens=MAX_CONTEXT_TOKENS, reserved_tokens=RESERVED_TOKENS),
+        tracer=JsonLinesTracer(path=TRACE_FILE) if TRACE_FILE else None,
+        tool_router=KeywordToolRouter(),
+        completion_cache=CompletionCache(COMPLETION_CACHE) if COMPLETION_CACHE else None,
+        cassette=get_cassette()
+    )
+    options.update(kwargs)
+    return DialClient(**options)
@@ -0,0 +1,100 @@
+import json
+import threading
+import time
+import uuid
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Any, TextIO
+
+
+@dataclass
+class Span:
+    name: str
+    turn_id: str
+    # Wall clock start (unix seconds) and duration in seconds
+    start: float
+    duration: float
+    attributes: dict[str, Any] = field(default_factory=dict)
+
+
+class Tracer:
+    """Receives spans emitted by DialClient. This default implementation drops them."""
+
+    def emit(self, span: Span) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class JsonLinesTracer(Tracer):
+    """Writes each span as one JSON line to a file"""
+
+    def __init__(self, path: str | None = None, stream: TextIO | None = None):
+        if (path is None) == (stream is None):
+            raise ValueError("Either path or stream must be provided")
+        self.__owns_stream = stream is None
+        self.__stream = stream if stream is not None else open(path, "a", encoding="utf-8")
+        self.__lock = threading.Lock()
+
+    def emit(self, span: Span) -> None:
+        line = json.dumps(asdict(span), ensure_ascii=False, default=str)
+        with self.__lock:
+            self.__stream.write(line + "\n")
+            self.__stream.flush()
+
+    def close(self) -> None:
+        if self.__owns_stream:
+            self.__stream.close()
+
+
+class TurnTrace:
+    """
+    Spans of one agent turn. All spans share `turn_id` and get current `tool_round` attribute.
+    Spans: request_build, http_connect, ttfb, ttft, stream, tool, turn, retry and hedge (when a hedged request is sent).
+    `request_build` has number of tools sent with the request in `tools` attribute and, with completion cache,
+    `cache` attribute (`hit` or `miss`).
+    """
+
+    def __init__(self, tracer: Tracer, **attributes: Any):
+        self.turn_id = uuid.uuid4().hex
+        self.tool_round = 0
+        self.first_token_recorded = False
+        self.__tracer = tracer
+        self.__attributes = attributes
+        self.__started_at = time.perf_counter()
+
+    @property
+    def started_at(self) -> float:
+        return self.__started_at
+
+    def record(self, name: str, started_at: float, duration: float | None = None, **attributes: Any) -> None:
+        """Emits span that started at `started_at` (`time.perf_counter()`) and lasts until now or `duration`"""
+        now = time.perf_counter()
+        if duration is None:
+            duration = now - started_at
+        self.__tracer.emit(Span(
+            name=name,
+            turn_id=self.turn_id,
+            start=time.time() - (now - started_at),
+            duration=duration,
+            attributes={"tool_round": self.tool_round, **attributes},
+        ))
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[dict[str, Any]]:
+        """Measures the block, yielded dict can be used to add attributes"""
+        started_at = time.perf_counter()
+        try:
+            yield attributes
+        finally:
+            self.record(name, started_at, **attributes)
+
+    def first_token(self) -> None:
+        if not self.first_token_recorded:
+            self.first_token_recorded = True
+            self.record("ttft", self.__started_at)
+
+    def end(self, **attributes: Any) -> None:
+        self.record("turn", self.__started_at, tool_rounds=self.tool_round, **self.__attributes, **attributes)
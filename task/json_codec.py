@@ -0,0 +1,20 @@
+"""JSON helpers used on hot paths. Uses `orjson` when it is installed, otherwise falls back to stdlib `json`."""
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+BACKEND = "orjson" if orjson else "json"
+
+
+def _json_dumps(obj: Any) -> bytes:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+# Bound directly to backend functions to avoid extra call per parsed chunk
+loads = orjson.loads if orjson else json.loads
+# Compact UTF-8 encoded JSON
+dumps = orjson.dumps if orjson else _json_dumps
@@ -1,17 +1,44 @@
 import uuid
 from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
 
 from task.models.message import Message
 
+if TYPE_CHECKING:
+    from task.store import ConversationStore
+
 
 @dataclass
 class Conversation:
     id: str = field(default_factory=lambda: str(uuid.uuid4()))
     messages: list[Message] = field(default_factory=list)
+    # Messages are appended to the store as they are added, see `ConversationStore.load` to resume
+    store: "ConversationStore | None" = field(default=None, repr=False, compare=False)
+    _persisted_messages: int = field(default=0, init=False, repr=False)
+    _next_seq: int = field(default=0, init=False, repr=False)
 
     def add_message(self, message: Message) -> None:
+        # Message is final once it's in history, so encode it now and every next request reuses the bytes
+        message.to_json()
         self.messages.append(message)
+        self.persist()
+
+    def persist(self) -> None:
+        """
+        Writes messages added since the previous call to the store (DialClient appends tool round messages to
+        `messages` directly, they are written together with the next added message)
+        """
+        if self.store is None or self._persisted_messages == len(self.messages):
+            return
+        pending = self.messages[self._persisted_messages:]
+        self.store.append(self.id, self._next_seq, pending)
+        self._persisted_messages = len(self.messages)
+        self._next_seq += len(pending)
+
+    def mark_persisted(self, next_seq: int) -> None:
+        """Marks current messages as already stored, next stored message gets `next_seq`"""
+        self._persisted_messages = len(self.messages)
+        self._next_seq = next_seq
 
     def get_messages(self) -> list[Message]:
         return self.messages
-    
\ No newline at end of file
@@ -1,6 +1,7 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Any
 
+from task import json_codec
 from task.models.role import Role
 
 
@@ -11,6 +12,13 @@ class Message:
     tool_call_id: str | None = None
     name: str| None = None
     tool_calls: list[dict[str, Any]] | None = None
+    # Cached JSON fragment of `to_dict()`, reset whenever a field is reassigned
+    _encoded: bytes | None = field(default=None, init=False, repr=False, compare=False)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        if name != "_encoded":
+            object.__setattr__(self, "_encoded", None)
+        object.__setattr__(self, name, value)
 
     def to_dict(self) -> dict[str, Any]:
         result = {
@@ -24,3 +32,26 @@ class Message:
         if self.tool_calls:
             result["tool_calls"] = self.tool_calls
         return result
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "Message":
+        return cls(
+            role=Role(data["role"]),
+            content=data.get("content") or "",
+            tool_call_id=data.get("tool_call_id"),
+            name=data.get("name"),
+            tool_calls=data.get("tool_calls"),
+        )
+
+    def to_json(self) -> bytes:
+        """
+        Encoded `to_dict()`, computed once and reused by every following request.
+        NOTE: nested `tool_calls` must not be mutated in place after the message is sent, reassign the field instead.
+        """
+        if self._encoded is None:
+            self._encoded = json_codec.dumps(self.to_dict())
+        return self._encoded
+
+    def estimate_tokens(self) -> int:
+        """Cheap token estimate (~4 bytes of encoded JSON per token + per-message overhead), no tokenizer needed"""
+        return len(self.to_json()) // 4 + 4
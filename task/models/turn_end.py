@@ -0,0 +1,16 @@
+from dataclasses import dataclass
+from enum import StrEnum
+
+
+class TerminationReason(StrEnum):
+    COMPLETED = "completed"
+    MAX_TOOL_ROUNDS = "max_tool_rounds"
+    TIMEOUT = "timeout"
+
+
+@dataclass
+class TurnEnd:
+    """Last event of an agent turn, tells why the turn stopped"""
+    reason: TerminationReason
+    tool_rounds: int
+    elapsed: float
@@ -0,0 +1,109 @@
+import random
+import sys
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+
+
+class HTTPStatusError(Exception):
+    """Non-200 response from DIAL, keeps the `HTTP {status}: {text}` message format"""
+
+    def __init__(self, status: int, text: str, retry_after: str | None = None):
+        super().__init__(f"HTTP {status}: {text}")
+        self.status = status
+        self.retry_after = retry_after
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """`Retry-After` header (seconds or HTTP date) as seconds from now"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    # HTTP date form is rare, `email` package is imported only for it
+    from email.utils import parsedate_to_datetime
+
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+@dataclass
+class RetryPolicy:
+    """
+    Retries of failed DIAL requests with full jitter exponential backoff.
+    429/503 `Retry-After` is honoured instead of the backoff unless it is longer than `max_retry_after`.
+    """
+    max_attempts: int = 3
+    backoff_base: float = 0.5
+    backoff_max: float = 8.0
+    max_retry_after: float = 60.0
+    retry_statuses: frozenset[int] = field(default_factory=lambda: frozenset({408, 409, 429, 500, 502, 503, 504}))
+
+    def is_retryable(self, error: BaseException) -> bool:
+        if isinstance(error, HTTPStatusError):
+            return error.status in self.retry_statuses
+        # Connection errors and timeouts (connect, first token) are worth another attempt
+        if isinstance(error, (OSError, TimeoutError)):
+            return True
+        # aiohttp is imported lazily, its errors can only come once it is loaded
+        aiohttp = sys.modules.get("aiohttp")
+        return aiohttp is not None and isinstance(error, (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError))
+
+    def delay(self, attempt: int, error: BaseException) -> float | None:
+        """Seconds to wait before attempt `attempt + 1` (attempts count from 0), `None` means don't retry"""
+        if attempt + 1 >= self.max_attempts or not self.is_retryable(error):
+            return None
+        retry_after = parse_retry_after(getattr(error, "retry_after", None))
+        if retry_after is not None:
+            if retry_after > self.max_retry_after:
+                return None
+            # Small jitter on top, so clients told the same moment don't come back together
+            return retry_after + random.uniform(0, self.backoff_base)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+
+class LatencyTracker:
+    """Sliding window of observed latencies (seconds) with percentiles"""
+
+    def __init__(self, window: int = 200):
+        self.__samples: deque[float] = deque(maxlen=window)
+        self.__lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.__samples)
+
+    def add(self, latency: float) -> None:
+        with self.__lock:
+            self.__samples.append(latency)
+
+    def percentile(self, percentile: float) -> float | None:
+        with self.__lock:
+            if not self.__samples:
+                return None
+            ordered = sorted(self.__samples)
+        index = min(len(ordered) - 1, int(len(ordered) * percentile / 100))
+        return ordered[index]
+
+
+@dataclass
+class HedgePolicy:
+    """
+    Hedged streaming requests: when the first request hasn't produced its first chunk after `delay` seconds,
+    the same request is sent again and whichever answers first is used, the other one is cancelled.
+    The delay is the `percentile` of recent time to first chunk, `initial_delay` until `min_samples` are seen.
+    """
+    percentile: float = 95.0
+    initial_delay: float = 2.0
+    min_delay: float = 0.2
+    min_samples: int = 20
+    latencies: LatencyTracker = field(default_factory=LatencyTracker)
+
+    def delay(self) -> float:
+        if len(self.latencies) < self.min_samples:
+            return self.initial_delay
+        return max(self.min_delay, self.latencies.percentile(self.percentile))
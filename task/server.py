@@ -0,0 +1,246 @@
+"""
+Server mode: hosts many conversations in one asyncio process and streams assistant answers over SSE.
+
+POST   /sessions/{session_id}/messages  {"content": "..."}  -> text/event-stream
+       data: {"type": "token", "content": "..."}   (repeated)
+       data: {"type": "message", "content": "..."} (final assistant message)
+       data: {"type": "turn_end", "reason": "...", "tool_rounds": N, "elapsed": S}
+       data: [DONE]
+DELETE /sessions/{session_id}
+GET    /health
+
+Run: python -m task.server --port 8080 --max-streams 200
+"""
+import argparse
+import asyncio
+import contextlib
+import time
+from dataclasses import dataclass, field
+
+from aiohttp import web
+
+from task.client import DialClient
+from task.factory import CONVERSATION_DB, MAX_CONTEXT_TOKENS, RESERVED_TOKENS, create_dial_client, create_user_client
+from task.models.conversation import Conversation
+from task.models.message import Message
+from task.models.role import Role
+from task.models.turn_end import TurnEnd
+from task.prompts import SYSTEM_PROMPT
+from task.store import ConversationStore
+from task.streaming.sinks import CoalescingSink, SSESink, send_event
+
+@dataclass
+class Session:
+    conversation: Conversation
+    # One turn at a time per conversation, next message waits for the current turn
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    last_active: float = field(default_factory=time.monotonic)
+
+
+class SessionManager:
+    """
+    Sessions in memory. With `store` evicted or unknown sessions are resumed from it, loading only the newest
+    `resume_tokens` of history, so sessions survive restarts and can move between server processes.
+    """
+
+    def __init__(
+            self,
+            idle_timeout: float = 1800.0,
+            max_sessions: int = 10_000,
+            store: ConversationStore | None = None,
+            resume_tokens: int | None = MAX_CONTEXT_TOKENS - RESERVED_TOKENS,
+    ):
+        self.__sessions: dict[str, Session] = {}
+        self.__idle_timeout = idle_timeout
+        self.__max_sessions = max_sessions
+        self.__store = store
+        self.__resume_tokens = resume_tokens
+
+    def __len__(self) -> int:
+        return len(self.__sessions)
+
+    def get_or_create(self, session_id: str) -> Session:
+        session = self.__sessions.get(session_id)
+        if session is None:
+            if len(self.__sessions) >= self.__max_sessions:
+                self.evict_idle(force=True)
+            if self.__store is not None:
+                conversation = self.__store.load(session_id, max_tokens=self.__resume_tokens)
+            else:
+                conversation = Conversation(id=session_id)
+            if not conversation.messages:
+                conversation.add_message(Message(role=Role.SYSTEM, content=SYSTEM_PROMPT))
+            session = Session(conversation=conversation)
+            self.__sessions[session_id] = session
+        session.last_active = time.monotonic()
+        return session
+
+    def remove(self, session_id: str) -> bool:
+        """Forgets the session and deletes its stored history"""
+        removed = self.__sessions.pop(session_id, None) is not None
+        deleted_from_store = self.__store is not None and self.__store.delete(session_id)
+        return removed or deleted_from_store
+
+    def evict_idle(self, force: bool = False) -> int:
+        """
+        Removes sessions idle longer than `idle_timeout`. With `force` the least recently active half of sessions
+        is removed as well (used when `max_sessions` is reached). Sessions in the middle of a turn are kept.
+        """
+        now = time.monotonic()
+        idle = [
+            session_id for session_id, session in self.__sessions.items()
+            if not session.lock.locked() and now - session.last_active > self.__idle_timeout
+        ]
+        if force and not idle:
+            by_activity = sorted(
+                (session.last_active, session_id) for session_id, session in self.__sessions.items()
+                if not session.lock.locked()
+            )
+            idle = [session_id for _, session_id in by_activity[:max(1, len(by_activity) // 2)]]
+        for session_id in idle:
+            del self.__sessions[session_id]
+        return len(idle)
+
+    async def run_eviction(self, interval: float = 60.0) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            evicted = self.evict_idle()
+            if evicted:
+                print(f"Evicted {evicted} idle sessions, {len(self)} left")
+
+
+DIAL_CLIENT = web.AppKey("dial_client", DialClient)
+SESSIONS = web.AppKey("sessions", SessionManager)
+STREAMS = web.AppKey("streams", asyncio.Semaphore)
+
+
+async def post_message(request: web.Request) -> web.StreamResponse:
+    try:
+        body = await request.json()
+        content = str(body["content"]).strip()
+    except (ValueError, KeyError, TypeError):
+        return web.json_response({"error": "Body must be JSON object with `content`"}, status=400)
+    streams = request.app[STREAMS]
+    if streams.locked():
+        # Reject instead of queueing, so overload shows up at the client right away
+        return web.json_response({"error": "Too many concurrent streams"}, status=503, headers={"Retry-After": "1"})
+
+    session = request.app[SESSIONS].get_or_create(request.match_info["session_id"])
+    async with streams:
+        response = web.StreamResponse(headers={
+            "Content-Type": "text/event-stream",
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",
+        })
+        await response.prepare(request)
+        async with session.lock:
+            conversation = session.conversation
+            conversation.add_message(Message(role=Role.USER, content=content))
+            # Tokens arriving within a few ms go out as one event, a slow client doesn't hold up reading the stream
+            tokens = CoalescingSink(SSESink(response))
+            try:
+                async for event in request.app[DIAL_CLIENT].stream_completion_gen(conversation.messages):
+                    if isinstance(event, str):
+                        await tokens.write(event)
+                    elif isinstance(event, Message):
+                        conversation.add_message(event)
+                        await tokens.flush()
+                        await send_event(response, {"type": "message", "content": event.content})
+                    elif isinstance(event, TurnEnd):
+                        await tokens.flush()
+                        await send_event(response, {
+                            "type": "turn_end",
+                            "reason": event.reason,
+                            "tool_rounds": event.tool_rounds,
+                            "elapsed": event.elapsed
+                        })
+            except ConnectionResetError:
+                # Client went away, the turn is dropped
+                return response
+            except Exception as e:
+                await tokens.flush()
+                await send_event(response, {"type": "error", "error": str(e)})
+            finally:
+                with contextlib.suppress(ConnectionResetError):
+                    await tokens.close()
+                session.last_active = time.monotonic()
+        await response.write(b"data: [DONE]\n\n")
+        await response.write_eof()
+        return response
+
+
+async def delete_session(request: web.Request) -> web.Response:
+    removed = request.app[SESSIONS].remove(request.match_info["session_id"])
+    return web.Response(status=204 if removed else 404)
+
+
+async def health(request: web.Request) -> web.Response:
+    return web.json_response({
+        "status": "ok",
+        "sessions": len(request.app[SESSIONS]),
+        "deployments": request.app[DIAL_CLIENT].deployments.stats()
+    })
+
+
+def create_app(
+        max_streams: int = 200,
+        idle_timeout: float = 1800.0,
+        max_sessions: int = 10_000,
+        store_path: str | None = CONVERSATION_DB,
+        dial_client: DialClient | None = None,
+) -> web.Application:
+    """
+    :param store_path: SQLite file to persist conversations in, sessions live only in memory when None
+    :param dial_client: client shared by all sessions, by default created with `create_dial_client` on startup.
+        Passed client is not closed by the app.
+    """
+    app = web.Application()
+    store = ConversationStore(store_path) if store_path else None
+    app[SESSIONS] = SessionManager(idle_timeout=idle_timeout, max_sessions=max_sessions, store=store)
+    app[STREAMS] = asyncio.Semaphore(max_streams)
+
+    async def lifecycle(app: web.Application):
+        async with contextlib.AsyncExitStack() as stack:
+            if dial_client is None:
+                user_client = await stack.enter_async_context(create_user_client())
+                app[DIAL_CLIENT] = await stack.enter_async_context(
+                    create_dial_client(user_client, connection_limit_per_host=max_streams)
+                )
+            else:
+                app[DIAL_CLIENT] = dial_client
+            eviction = asyncio.create_task(app[SESSIONS].run_eviction(interval=min(60.0, idle_timeout)))
+            yield
+            eviction.cancel()
+            if store is not None:
+                store.close()
+
+    app.cleanup_ctx.append(lifecycle)
+    app.router.add_post("/sessions/{session_id}/messages", post_message)
+    app.router.add_delete("/sessions/{session_id}", delete_session)
+    app.router.add_get("/health", health)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--max-streams", type=int, default=200, help="max concurrently streamed turns")
+    parser.add_argument("--idle-timeout", type=float, default=1800.0, help="evict sessions idle for this many seconds")
+    parser.add_argument("--max-sessions", type=int, default=10_000)
+    parser.add_argument("--store", default=CONVERSATION_DB, help="SQLite file to persist conversations in")
+    args = parser.parse_args()
+    web.run_app(
+        create_app(
+            max_streams=args.max_streams,
+            idle_timeout=args.idle_timeout,
+            max_sessions=args.max_sessions,
+            store_path=args.store
+        ),
+        host=args.host,
+        port=args.port
+    )
+
+
+if __name__ == "__main__":
+    main()
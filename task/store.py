@@ -0,0 +1,113 @@
+import sqlite3
+import threading
+
+from task import json_codec
+from task.models.conversation import Conversation
+from task.models.message import Message
+from task.models.role import Role
+
+
+class ConversationStore:
+    """
+    Append-only SQLite store of conversation messages, indexed by conversation id.
+
+    Every message is written once with its sequence number and token estimate, so resuming a conversation reads only
+    the tail that fits the context window instead of the whole history. WAL mode lets several processes on one host
+    share the file.
+    """
+
+    def __init__(self, path: str):
+        self.__connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.__lock = threading.Lock()
+        with self.__lock:
+            self.__connection.execute("PRAGMA journal_mode=WAL")
+            # Fsync on checkpoints only: a power loss may lose last messages but never corrupts the file
+            self.__connection.execute("PRAGMA synchronous=NORMAL")
+            self.__connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS messages (
+                    conversation_id TEXT NOT NULL,
+                    seq INTEGER NOT NULL,
+                    role TEXT NOT NULL,
+                    tokens INTEGER NOT NULL,
+                    payload BLOB NOT NULL,
+                    PRIMARY KEY (conversation_id, seq)
+                ) WITHOUT ROWID
+                """
+            )
+
+    def append(self, conversation_id: str, first_seq: int, messages: list[Message]) -> None:
+        """Writes `messages` with sequence numbers starting at `first_seq` in one transaction"""
+        rows = [
+            (conversation_id, first_seq + i, message.role.value, message.estimate_tokens(), message.to_json())
+            for i, message in enumerate(messages)
+        ]
+        with self.__lock:
+            self.__connection.execute("BEGIN")
+            try:
+                self.__connection.executemany("INSERT INTO messages VALUES (?, ?, ?, ?, ?)", rows)
+            except BaseException:
+                self.__connection.execute("ROLLBACK")
+                raise
+            self.__connection.execute("COMMIT")
+
+    def load(self, conversation_id: str, max_tokens: int | None = None) -> Conversation:
+        """
+        Conversation with leading system messages and the newest messages that fit `max_tokens` (all when None).
+        The tail starts at a user message, so tool calls are never separated from their results.
+        New conversation bound to this store is returned for unknown id.
+        """
+        with self.__lock:
+            system_rows: list[tuple[int, bytes]] = []
+            budget = max_tokens
+            for seq, role, tokens, payload in self.__connection.execute(
+                    "SELECT seq, role, tokens, payload FROM messages WHERE conversation_id = ? ORDER BY seq",
+                    (conversation_id,)
+            ):
+                if role != Role.SYSTEM.value:
+                    break
+                system_rows.append((seq, payload))
+                if budget is not None:
+                    budget -= tokens
+
+            next_seq = system_rows[-1][0] + 1 if system_rows else 0
+            tail: list[bytes] = []
+            kept = 0
+            trimmed = False
+            # Newest first, the cursor is consumed lazily, so reading stops as soon as the budget is spent
+            for seq, role, tokens, payload in self.__connection.execute(
+                    "SELECT seq, role, tokens, payload FROM messages WHERE conversation_id = ? AND seq >= ? "
+                    "ORDER BY seq DESC",
+                    (conversation_id, next_seq)
+            ):
+                next_seq = max(next_seq, seq + 1)
+                if budget is not None:
+                    budget -= tokens
+                    if budget < 0 and kept:
+                        trimmed = True
+                        break
+                tail.append(payload)
+                if role == Role.USER.value:
+                    kept = len(tail)
+
+        if trimmed:
+            tail = tail[:kept]
+        payloads = [payload for _, payload in system_rows] + tail[::-1]
+        conversation = Conversation(id=conversation_id, store=self)
+        for payload in payloads:
+            message = Message.from_dict(json_codec.loads(payload))
+            # Stored bytes are the message encoding, no need to encode it again for the next request
+            message._encoded = payload
+            conversation.messages.append(message)
+        conversation.mark_persisted(next_seq)
+        return conversation
+
+    def delete(self, conversation_id: str) -> bool:
+        """Deletes stored messages of the conversation, returns whether there were any"""
+        with self.__lock:
+            cursor = self.__connection.execute("DELETE FROM messages WHERE conversation_id = ?", (conversation_id,))
+        return cursor.rowcount > 0
+
+    def close(self) -> None:
+        with self.__lock:
+            self.__connection.close()
@@ -0,0 +1,56 @@
+_OPEN = "{["
+_CLOSE = "}]"
+_STRUCTURAL = '{}[]"\\'
+
+
+class JsonCompletenessScanner:
+    """
+    Tells when a JSON object or array streamed in fragments is complete, without parsing it.
+    Tracks nesting depth and string/escape state, so every character is looked at once across all fragments.
+    Only brackets outside strings count; validity of the rest is left to the real parser.
+    """
+
+    def __init__(self):
+        self.complete = False
+        self.__depth = 0
+        self.__started = False
+        self.__in_string = False
+        self.__escape = False
+        # Top level value is not an object or array, completeness can't be told before the stream ends
+        self.__unsupported = False
+
+    def feed(self, fragment: str) -> bool:
+        """Consumes next fragment, returns True once the top level value is closed"""
+        if self.complete or self.__unsupported:
+            return self.complete
+        for char in fragment:
+            if not self.__started:
+                if char.isspace():
+                    continue
+                if char not in _OPEN:
+                    self.__unsupported = True
+                    return False
+                self.__started = True
+                self.__depth = 1
+                continue
+            if char not in _STRUCTURAL:
+                # Most characters are plain text, skip the state checks for them
+                self.__escape = False
+                continue
+            if self.__in_string:
+                if self.__escape:
+                    self.__escape = False
+                elif char == "\\":
+                    self.__escape = True
+                elif char == '"':
+                    self.__in_string = False
+            elif char == '"':
+                self.__in_string = True
+            elif char in _OPEN:
+                self.__depth += 1
+            elif char in _CLOSE:
+                self.__depth -= 1
+                if self.__depth == 0:
+                    self.complete = True
+                    return True
+        return False
@@ -0,0 +1,174 @@
+import asyncio
+import sys
+from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING, Any, TextIO
+
+from task import json_codec
+
+if TYPE_CHECKING:
+    from aiohttp import web
+
+
+class Sink(ABC):
+    """Async destination of streamed answer text"""
+
+    @abstractmethod
+    async def write(self, text: str) -> None:
+        pass
+
+    async def flush(self) -> None:
+        pass
+
+    async def close(self) -> None:
+        await self.flush()
+
+    async def __aenter__(self) -> "Sink":
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        await self.close()
+
+
+class ConsoleSink(Sink):
+    """Writes to `stream` (stdout by default) in a worker thread, so a slow terminal or pipe doesn't block the loop"""
+
+    def __init__(self, stream: TextIO | None = None):
+        self.__stream = stream or sys.stdout
+
+    def __write(self, text: str) -> None:
+        self.__stream.write(text)
+        self.__stream.flush()
+
+    async def write(self, text: str) -> None:
+        await asyncio.to_thread(self.__write, text)
+
+
+class FileSink(Sink):
+    """Appends to a UTF-8 text file, opened on first write, in a worker thread"""
+
+    def __init__(self, path: str):
+        self.__path = path
+        self.__file: TextIO | None = None
+
+    def __write(self, text: str) -> None:
+        if self.__file is None:
+            self.__file = open(self.__path, "a", encoding="utf-8")
+        self.__file.write(text)
+        self.__file.flush()
+
+    async def write(self, text: str) -> None:
+        await asyncio.to_thread(self.__write, text)
+
+    async def close(self) -> None:
+        if self.__file is not None:
+            await asyncio.to_thread(self.__file.close)
+            self.__file = None
+
+
+class SSESink(Sink):
+    """Sends text as `{"type": "token", "content": ...}` events of an SSE response"""
+
+    def __init__(self, response: "web.StreamResponse"):
+        self.__response = response
+
+    async def write(self, text: str) -> None:
+        await send_event(self.__response, {"type": "token", "content": text})
+
+
+async def send_event(response: "web.StreamResponse", payload: dict[str, Any]) -> None:
+    await response.write(b"data: " + json_codec.dumps(payload) + b"\n\n")
+
+
+class CoalescingSink(Sink):
+    """
+    Bounded buffer in front of a slower `sink`. `write` only appends to the buffer; a background task joins
+    buffered chunks and writes them to `sink` once `max_chars` are collected or `max_delay` seconds after
+    the first buffered chunk, so a burst of tokens costs one write (syscall, SSE event) instead of one per token.
+    While the sink is busy the stream keeps being read into the buffer; only when the buffer holds `max_buffer`
+    chars `write` waits for it to drain, so a stuck consumer can't grow memory without bound.
+    Errors of `sink` are raised by the next `write`, `flush` or `close`.
+    """
+
+    def __init__(self, sink: Sink, max_chars: int = 1024, max_delay: float = 0.02, max_buffer: int = 64 * 1024):
+        self.__sink = sink
+        self.__max_chars = max_chars
+        self.__max_delay = max_delay
+        self.__max_buffer = max_buffer
+        self.__parts: list[str] = []
+        self.__size = 0
+        self.__pending = asyncio.Event()
+        self.__full = asyncio.Event()
+        self.__drained = asyncio.Event()
+        self.__drained.set()
+        self.__idle = asyncio.Event()
+        self.__idle.set()
+        self.__closing = False
+        self.__error: BaseException | None = None
+        self.__task: asyncio.Task | None = None
+
+    def __raise_error(self) -> None:
+        if self.__error is not None:
+            raise self.__error
+
+    async def write(self, text: str) -> None:
+        self.__raise_error()
+        if not text:
+            return
+        while self.__size >= self.__max_buffer:
+            await self.__drained.wait()
+            self.__raise_error()
+        self.__parts.append(text)
+        self.__size += len(text)
+        self.__idle.clear()
+        self.__pending.set()
+        if self.__size >= self.__max_chars:
+            self.__full.set()
+        if self.__size >= self.__max_buffer:
+            self.__drained.clear()
+        if self.__task is None:
+            self.__task = asyncio.create_task(self.__run())
+
+    async def __run(self) -> None:
+        try:
+            while True:
+                await self.__pending.wait()
+                if not self.__full.is_set() and not self.__closing:
+                    try:
+                        await asyncio.wait_for(self.__full.wait(), self.__max_delay)
+                    except TimeoutError:
+                        pass
+                text = "".join(self.__parts)
+                self.__parts.clear()
+                self.__size = 0
+                self.__pending.clear()
+                self.__full.clear()
+                self.__drained.set()
+                if text:
+                    await self.__sink.write(text)
+                if not self.__parts:
+                    self.__idle.set()
+                    if self.__closing:
+                        return
+        except Exception as e:
+            self.__error = e
+            # Unblock writers waiting for space and `flush`, they raise the error
+            self.__drained.set()
+            self.__idle.set()
+
+    async def flush(self) -> None:
+        """Writes buffered text to the sink now and waits until it is written"""
+        if not self.__idle.is_set():
+            self.__full.set()
+            await self.__idle.wait()
+        self.__raise_error()
+        await self.__sink.flush()
+
+    async def close(self) -> None:
+        self.__closing = True
+        self.__pending.set()
+        try:
+            if self.__task is not None:
+                await self.__task
+            self.__raise_error()
+        finally:
+            await self.__sink.close()
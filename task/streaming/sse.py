@@ -0,0 +1,141 @@
+from typing import Any
+
+from task import json_codec
+from task.streaming.json_scan import JsonCompletenessScanner
+
+DONE = b"[DONE]"
+
+
+class SSEDecoder:
+    """
+    Incremental `text/event-stream` decoder. Accepts raw chunks as they come from the socket and returns `data`
+    payloads of completed events. Multi-line `data:` fields are joined with `\\n`, comments and other fields
+    (`event:`, `id:`, `retry:`) are skipped.
+    """
+
+    def __init__(self):
+        self.__buffer = b""
+
+    def feed(self, chunk: bytes) -> list[bytes]:
+        if b"\r" in chunk or self.__buffer.endswith(b"\r"):
+            chunk = self.__normalize(chunk)
+        buffer = self.__buffer + chunk if self.__buffer else chunk
+
+        events = []
+        start = 0
+        while True:
+            end = buffer.find(b"\n\n", start)
+            if end == -1:
+                break
+            data = self.__parse_event(buffer, start, end)
+            if data is not None:
+                events.append(data)
+            start = end + 2
+        self.__buffer = buffer[start:]
+        return events
+
+    def flush(self) -> list[bytes]:
+        """Returns last event if stream ended without trailing blank line"""
+        buffer, self.__buffer = self.__buffer.rstrip(b"\r\n"), b""
+        if not buffer:
+            return []
+        data = self.__parse_event(buffer, 0, len(buffer))
+        return [data] if data is not None else []
+
+    def __normalize(self, chunk: bytes) -> bytes:
+        # `\r\n` may be split between chunks, keep the dangling `\r` until next chunk comes
+        if self.__buffer.endswith(b"\r"):
+            self.__buffer = self.__buffer[:-1]
+            chunk = b"\r" + chunk
+        tail = b""
+        if chunk.endswith(b"\r"):
+            chunk, tail = chunk[:-1], b"\r"
+        return chunk.replace(b"\r\n", b"\n").replace(b"\r", b"\n") + tail
+
+    @staticmethod
+    def __parse_event(buffer: bytes, start: int, end: int) -> bytes | None:
+        # Fast path: single `data:` line, which is what chat completion streams send
+        if buffer.startswith(b"data:", start) and buffer.find(b"\n", start, end) == -1:
+            start += 5
+            if buffer[start:start + 1] == b" ":
+                start += 1
+            return buffer[start:end]
+
+        data_lines = []
+        for line in buffer[start:end].split(b"\n"):
+            if not line.startswith(b"data"):
+                continue
+            if line == b"data":
+                data_lines.append(b"")
+            elif line.startswith(b"data:"):
+                value = line[5:]
+                data_lines.append(value[1:] if value.startswith(b" ") else value)
+        return b"\n".join(data_lines) if data_lines else None
+
+
+class ChatStreamAccumulator:
+    """Collects streamed chat completion deltas into final content and tool calls"""
+
+    def __init__(self):
+        self.done = False
+        self.finish_reason: str | None = None
+        self.__contents: list[str] = []
+        self.__tool_calls: dict[int, dict[str, Any]] = {}
+        self.__argument_scanners: dict[int, JsonCompletenessScanner] = {}
+        self.__completed_tool_calls: list[dict[str, Any]] = []
+
+    @property
+    def content(self) -> str:
+        return "".join(self.__contents)
+
+    @property
+    def tool_calls(self) -> list[dict[str, Any]]:
+        return list(self.__tool_calls.values())
+
+    def pop_completed_tool_calls(self) -> list[dict[str, Any]]:
+        """Tool calls whose `arguments` JSON became complete since the previous call, while the stream goes on"""
+        completed = self.__completed_tool_calls
+        self.__completed_tool_calls = []
+        return completed
+
+    def __scan_arguments(self, index: int, arguments: str) -> None:
+        scanner = self.__argument_scanners.get(index)
+        if scanner is None:
+            scanner = self.__argument_scanners[index] = JsonCompletenessScanner()
+        if not scanner.complete and scanner.feed(arguments):
+            self.__completed_tool_calls.append(self.__tool_calls[index])
+
+    def feed(self, data: bytes) -> str | None:
+        """Applies one SSE `data` payload, returns content piece from it if any"""
+        if data == DONE:
+            self.done = True
+            return None
+        choices = json_codec.loads(data).get("choices")
+        if not choices:
+            return None
+        choice = choices[0]
+        if choice.get("finish_reason"):
+            self.finish_reason = choice["finish_reason"]
+        delta = choice.get("delta")
+        if not delta:
+            return None
+
+        tool_calls = delta.get("tool_calls")
+        if tool_calls:
+            for tool_call in tool_calls:
+                index = tool_call.get("index")
+                if index not in self.__tool_calls:
+                    arguments = tool_call.setdefault("function", {}).setdefault("arguments", "")
+                    self.__tool_calls[index] = tool_call
+                else:
+                    arguments = tool_call.get("function", {}).get("arguments")
+                    if arguments:
+                        self.__tool_calls[index]["function"]["arguments"] += arguments
+                if arguments:
+                    self.__scan_arguments(index, arguments)
+
+        content = delta.get("content")
+        if content:
+            self.__contents.append(content)
+            return content
+        return None
@@ -1,13 +1,26 @@
+import asyncio
 from abc import ABC, abstractmethod
+from concurrent.futures import Executor
+from functools import cached_property
 from typing import Any
 
 
 class BaseTool(ABC):
 
+    # Max seconds a single call of this tool may take, `None` falls back to the client default
+    timeout: float | None = None
+    # Tool only reads data, so calling it early or more than once has no side effects
+    read_only: bool = False
+
     @abstractmethod
     def execute(self, arguments: dict[str, Any]) -> str:
         pass
 
+    async def execute_async(self, arguments: dict[str, Any], executor: Executor | None = None) -> str:
+        """Async execution path. By default runs blocking `execute` in `executor` so it doesn't block the loop"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, self.execute, arguments)
+
     @property
     @abstractmethod
     def name(self) -> str:
@@ -23,9 +36,9 @@ class BaseTool(ABC):
     def input_schema(self) -> dict[str, Any]:
         pass
 
-    @property
+    @cached_property
     def schema(self) -> dict[str, Any]:
-        """Provides tools JSON Schema"""
+        """Provides tools JSON Schema, built once per tool instance"""
         return {
             "type": "function",
             "function": {
@@ -0,0 +1,66 @@
+from typing import Any, Iterator
+
+from task import json_codec
+from task.tools.base import BaseTool
+
+
+class ToolRegistry:
+    """
+    Tools by name with their schemas built once. After `freeze()` the `tools` payload of chat completion requests
+    is kept as pre-encoded JSON, so it is never encoded per request and the set of tools can't change.
+    """
+
+    def __init__(self, tools: list[BaseTool] | None = None):
+        self.__tools: dict[str, BaseTool] = {}
+        self.__schemas: list[dict[str, Any]] = []
+        self.__tools_json: bytes | None = None
+        self.__subsets_json: dict[frozenset[str], bytes] = {}
+        for tool in tools or []:
+            self.register(tool)
+
+    def register(self, tool: BaseTool) -> None:
+        if self.frozen:
+            raise RuntimeError("Tool registry is frozen")
+        if tool.name in self.__tools:
+            raise ValueError(f"Tool '{tool.name}' is already registered")
+        self.__tools[tool.name] = tool
+        self.__schemas.append(tool.schema)
+
+    def freeze(self) -> "ToolRegistry":
+        if self.__tools_json is None:
+            self.__tools_json = json_codec.dumps(self.__schemas)
+        return self
+
+    @property
+    def frozen(self) -> bool:
+        return self.__tools_json is not None
+
+    @property
+    def tools_json(self) -> bytes:
+        """Encoded list of tool schemas, freezes the registry"""
+        return self.freeze().__tools_json
+
+    def subset_json(self, names: frozenset[str]) -> bytes:
+        """Encoded schemas of the named tools in registration order, cached per subset, freezes the registry"""
+        self.freeze()
+        encoded = self.__subsets_json.get(names)
+        if encoded is None:
+            encoded = json_codec.dumps([tool.schema for tool in self.__tools.values() if tool.name in names])
+            self.__subsets_json[names] = encoded
+        return encoded
+
+    @property
+    def schemas(self) -> list[dict[str, Any]]:
+        return self.__schemas
+
+    def get(self, name: str) -> BaseTool | None:
+        return self.__tools.get(name)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.__tools
+
+    def __iter__(self) -> Iterator[BaseTool]:
+        return iter(self.__tools.values())
+
+    def __len__(self) -> int:
+        return len(self.__tools)
@@ -0,0 +1,92 @@
+import re
+from abc import ABC, abstractmethod
+
+from task.models.message import Message
+from task.models.role import Role
+from task.tools.registry import ToolRegistry
+
+# Tool groups of the agent: keyword patterns (matched at word start, case-insensitive) -> tools they need
+DEFAULT_GROUPS: dict[str, tuple[str, tuple[str, ...]]] = {
+    "user_lookup": (
+        r"user|person|people|customer|employee|who\b|find|search|look|show|list|email|e-mail|@|\bid\b|\d+|"
+        r"name|surname|gender|compan|phone|salary|address",
+        ("get_user_by_id", "search_users"),
+    ),
+    "user_create": (
+        r"add|creat|register|new\b|insert|import|onboard",
+        ("add_user", "add_users", "search_users"),
+    ),
+    "user_update": (
+        r"updat|chang|modif|edit|set\b|renam|move|correct|fix",
+        ("update_user", "update_users", "get_user_by_id", "search_users"),
+    ),
+    "user_delete": (
+        r"delet|remov|drop|eras|purg|get rid",
+        ("delete_user", "delete_users", "get_user_by_id", "search_users"),
+    ),
+    "web": (
+        r"web|internet|online|google|news|latest|current|today|who is|what is|information|info\b|wiki|profile|"
+        r"famous|biograph",
+        ("web_search_tool",),
+    ),
+}
+
+
+class ToolRouter(ABC):
+    """Picks tools to send with the next request, so tool schemas of unrelated tools don't cost input tokens"""
+
+    @abstractmethod
+    def select(self, messages: list[Message], registry: ToolRegistry) -> frozenset[str] | None:
+        """Names of tools for the next request, `None` for all registered tools"""
+
+
+class KeywordToolRouter(ToolRouter):
+    """
+    Cheap local classifier: keyword groups matched against the latest user message, plus tools called during
+    the last `recent_turns` turns (follow-up questions usually need the same tools). Registered tools not covered
+    by any group are always sent. When no group matches, all tools are sent.
+    """
+
+    def __init__(
+            self,
+            groups: dict[str, tuple[str, tuple[str, ...]]] | None = None,
+            recent_turns: int = 2,
+    ):
+        groups = DEFAULT_GROUPS if groups is None else groups
+        self.__groups = [
+            (re.compile(rf"(?<!\w)(?:{pattern})", re.IGNORECASE), frozenset(tools))
+            for pattern, tools in groups.values()
+        ]
+        self.__grouped_tools = frozenset(tool for _, tools in self.__groups for tool in tools)
+        self.__recent_turns = recent_turns
+
+    def __recent_tools(self, messages: list[Message]) -> tuple[str | None, set[str]]:
+        """Latest user message and names of tools called in the last `recent_turns` turns (current one included)"""
+        used = set()
+        user_messages = 0
+        latest_user_message = None
+        for message in reversed(messages):
+            if message.role == Role.USER:
+                if latest_user_message is None:
+                    latest_user_message = message.content
+                user_messages += 1
+                if user_messages > self.__recent_turns:
+                    break
+            elif message.role == Role.AI and message.tool_calls:
+                used.update(tool_call.get("function", {}).get("name") for tool_call in message.tool_calls)
+        return latest_user_message, used
+
+    def select(self, messages: list[Message], registry: ToolRegistry) -> frozenset[str] | None:
+        latest_user_message, selected = self.__recent_tools(messages)
+        if not latest_user_message:
+            return None
+        matched = False
+        for pattern, tools in self.__groups:
+            if pattern.search(latest_user_message):
+                selected.update(tools)
+                matched = True
+        if not matched:
+            return None
+        selected.update(tool.name for tool in registry if tool.name not in self.__grouped_tools)
+        names = frozenset(name for name in selected if name in registry)
+        return None if len(names) == len(registry) else names
@@ -1,11 +1,23 @@
 from abc import ABC
+from functools import cache
+from typing import Any
+
+from pydantic import BaseModel
 
 from task.tools.base import BaseTool
+from task.tools.users.cache import UserCache
 from task.tools.users.user_client import UserClient
 
 
 class BaseUserServiceTool(BaseTool, ABC):
 
-    def __init__(self, user_client: UserClient):
+    def __init__(self, user_client: UserClient, cache: UserCache | None = None):
         super().__init__()
         self._user_client = user_client
+        self._cache = cache
+
+
+@cache
+def model_schema(model: type[BaseModel]) -> dict[str, Any]:
+    """JSON schema of pydantic model, generated once per model (don't mutate the result)"""
+    return model.model_json_schema()
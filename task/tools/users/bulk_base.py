@@ -0,0 +1,129 @@
+import asyncio
+from abc import ABC, abstractmethod
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Any
+
+from pydantic import ValidationError
+
+from task.tools.users.base import BaseUserServiceTool
+from task.tools.users.cache import UserCache
+from task.tools.users.user_client import UserClient
+
+
+def hoist_defs(schema: dict[str, Any], defs: dict[str, Any]) -> dict[str, Any]:
+    """Moves `$defs` of a pydantic schema into `defs`, so `#/$defs/...` refs resolve when it is nested"""
+    schema = dict(schema)
+    defs.update(schema.pop("$defs", {}))
+    return schema
+
+
+class BaseBulkUserServiceTool(BaseUserServiceTool, ABC):
+    """
+    Applies one user service operation to a list of items in a single tool call.
+    All items are validated before anything is sent; if any item is invalid nothing is sent at all.
+    Requests are sent concurrently, at most `concurrency` at a time, and the result lists an outcome per item.
+    """
+
+    # Hundreds of requests take longer than a single call
+    timeout = 300.0
+
+    def __init__(
+            self,
+            user_client: UserClient,
+            cache: UserCache | None = None,
+            concurrency: int = 8,
+            max_items: int = 500,
+    ):
+        super().__init__(user_client, cache)
+        self._concurrency = concurrency
+        self._max_items = max_items
+
+    @abstractmethod
+    def _items(self, arguments: dict[str, Any]) -> list[Any]:
+        """Raw items from tool arguments"""
+
+    @abstractmethod
+    def _validate_item(self, item: Any) -> Any:
+        """Validated item passed to `_apply`, raises on invalid item"""
+
+    @abstractmethod
+    def _apply(self, item: Any) -> str:
+        pass
+
+    @abstractmethod
+    async def _apply_async(self, item: Any) -> str:
+        pass
+
+    @abstractmethod
+    def _invalidate_cache(self, items: list[Any]) -> None:
+        pass
+
+    def __validate_all(self, arguments: dict[str, Any]) -> list[Any]:
+        items = self._items(arguments)
+        if not isinstance(items, list) or not items:
+            raise ValueError("Expected non-empty list of items")
+        if len(items) > self._max_items:
+            raise ValueError(f"Too many items: {len(items)}, max is {self._max_items}")
+        validated = []
+        errors = []
+        for index, item in enumerate(items):
+            try:
+                validated.append(self._validate_item(item))
+            except ValidationError as e:
+                # One line per item, full pydantic messages with docs links would flood the context
+                errors.append(f"#{index}: " + "; ".join(
+                    f"{'.'.join(map(str, error['loc']))}: {error['msg']}" for error in e.errors()
+                ))
+            except Exception as e:
+                errors.append(f"#{index}: {str(e)}")
+        if errors:
+            raise ValueError(f"{len(errors)} invalid items, nothing was sent:\n" + "\n".join(errors))
+        return validated
+
+    def __summary(self, outcomes: list[tuple[bool, str]]) -> str:
+        failed = sum(1 for ok, _ in outcomes if not ok)
+        lines = [f"{len(outcomes) - failed} succeeded, {failed} failed"]
+        lines.extend(
+            f"#{index}: {'ok' if ok else 'error'} - {text}" for index, (ok, text) in enumerate(outcomes)
+        )
+        return "\n".join(lines)
+
+    def __apply_safe(self, item: Any) -> tuple[bool, str]:
+        try:
+            return True, self._apply(item)
+        except Exception as e:
+            return False, str(e)
+
+    def execute(self, arguments: dict[str, Any]) -> str:
+        try:
+            items = self.__validate_all(arguments)
+        except Exception as e:
+            return f"Error: {str(e)}"
+        try:
+            with ThreadPoolExecutor(max_workers=min(self._concurrency, len(items))) as pool:
+                outcomes = list(pool.map(self.__apply_safe, items))
+        finally:
+            if self._cache:
+                self._invalidate_cache(items)
+        return self.__summary(outcomes)
+
+    async def execute_async(self, arguments: dict[str, Any], executor: Executor | None = None) -> str:
+        try:
+            items = self.__validate_all(arguments)
+        except Exception as e:
+            return f"Error: {str(e)}"
+        semaphore = asyncio.Semaphore(self._concurrency)
+
+        async def apply(item: Any) -> tuple[bool, str]:
+            async with semaphore:
+                try:
+                    return True, await self._apply_async(item)
+                except Exception as e:
+                    return False, str(e)
+
+        try:
+            outcomes = await asyncio.gather(*(apply(item) for item in items))
+        finally:
+            if self._cache:
+                self._invalidate_cache(items)
+        return self.__summary(outcomes)
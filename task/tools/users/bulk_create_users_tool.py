@@ -0,0 +1,50 @@
+from typing import Any
+
+from task.tools.users.base import model_schema
+from task.tools.users.bulk_base import BaseBulkUserServiceTool, hoist_defs
+from task.tools.users.models.user_info import UserCreate
+
+
+class BulkCreateUsersTool(BaseBulkUserServiceTool):
+
+    @property
+    def name(self) -> str:
+        return "add_users"
+
+    @property
+    def description(self) -> str:
+        return "Adds many new users to the system in one call. Use it instead of repeated `add_user` calls."
+
+    @property
+    def input_schema(self) -> dict[str, Any]:
+        defs = {}
+        user_schema = hoist_defs(model_schema(UserCreate), defs)
+        return {
+            "type": "object",
+            "properties": {
+                "users": {
+                    "type": "array",
+                    "items": user_schema,
+                    "description": "Users to add"
+                }
+            },
+            "required": [
+                "users"
+            ],
+            "$defs": defs
+        }
+
+    def _items(self, arguments: dict[str, Any]) -> list[Any]:
+        return arguments.get("users")
+
+    def _validate_item(self, item: Any) -> UserCreate:
+        return UserCreate.model_validate(item)
+
+    def _apply(self, item: UserCreate) -> str:
+        return self._user_client.add_user(item)
+
+    async def _apply_async(self, item: UserCreate) -> str:
+        return await self._user_client.add_user_async(item)
+
+    def _invalidate_cache(self, items: list[UserCreate]) -> None:
+        self._cache.invalidate_searches()
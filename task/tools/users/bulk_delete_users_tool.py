@@ -0,0 +1,50 @@
+from typing import Any
+
+from task.tools.users.bulk_base import BaseBulkUserServiceTool
+
+
+class BulkDeleteUsersTool(BaseBulkUserServiceTool):
+
+    @property
+    def name(self) -> str:
+        return "delete_users"
+
+    @property
+    def description(self) -> str:
+        return "Deletes many users by their unique IDs in one call. Use it instead of repeated `delete_user` calls."
+
+    @property
+    def input_schema(self) -> dict[str, Any]:
+        return {
+            "type": "object",
+            "properties": {
+                "ids": {
+                    "type": "array",
+                    "items": {
+                        "type": "integer"
+                    },
+                    "description": "The unique identifiers of the users to be deleted"
+                }
+            },
+            "required": [
+                "ids"
+            ]
+        }
+
+    def _items(self, arguments: dict[str, Any]) -> list[Any]:
+        return arguments.get("ids")
+
+    def _validate_item(self, item: Any) -> int:
+        if isinstance(item, bool) or not isinstance(item, (int, str)):
+            raise ValueError(f"Invalid user id: {item!r}")
+        return int(item)
+
+    def _apply(self, item: int) -> str:
+        return self._user_client.delete_user(item)
+
+    async def _apply_async(self, item: int) -> str:
+        return await self._user_client.delete_user_async(item)
+
+    def _invalidate_cache(self, items: list[int]) -> None:
+        for user_id in items:
+            self._cache.invalidate_user(user_id)
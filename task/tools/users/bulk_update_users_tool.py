@@ -0,0 +1,64 @@
+from typing import Any
+
+from task.tools.users.base import model_schema
+from task.tools.users.bulk_base import BaseBulkUserServiceTool, hoist_defs
+from task.tools.users.models.user_info import UserUpdate
+
+
+class BulkUpdateUsersTool(BaseBulkUserServiceTool):
+
+    @property
+    def name(self) -> str:
+        return "update_users"
+
+    @property
+    def description(self) -> str:
+        return "Updates many existing users in one call. Use it instead of repeated `update_user` calls."
+
+    @property
+    def input_schema(self) -> dict[str, Any]:
+        defs = {}
+        new_info_schema = hoist_defs(model_schema(UserUpdate), defs)
+        return {
+            "type": "object",
+            "properties": {
+                "updates": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "id": {
+                                "type": "integer",
+                                "description": "The unique identifier of the user to be updated"
+                            },
+                            "new_info": new_info_schema
+                        },
+                        "required": [
+                            "id",
+                            "new_info"
+                        ]
+                    },
+                    "description": "Users to update with their new info"
+                }
+            },
+            "required": [
+                "updates"
+            ],
+            "$defs": defs
+        }
+
+    def _items(self, arguments: dict[str, Any]) -> list[Any]:
+        return arguments.get("updates")
+
+    def _validate_item(self, item: Any) -> tuple[int, UserUpdate]:
+        return int(item["id"]), UserUpdate.model_validate(item["new_info"])
+
+    def _apply(self, item: tuple[int, UserUpdate]) -> str:
+        return self._user_client.update_user(*item)
+
+    async def _apply_async(self, item: tuple[int, UserUpdate]) -> str:
+        return await self._user_client.update_user_async(*item)
+
+    def _invalidate_cache(self, items: list[tuple[int, UserUpdate]]) -> None:
+        for user_id, _ in items:
+            self._cache.invalidate_user(user_id)
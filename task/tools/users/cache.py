@@ -0,0 +1,63 @@
+from typing import Any
+
+from task.cache import CacheStats, TTLCache
+
+_USER = "user"
+_SEARCH = "search"
+
+
+class UserCache:
+    """
+    Read-through cache of user service tool results shared by user tools.
+
+    Read tools check the cache before calling `UserClient` and store results with the `version` they read before
+    the call. Any write bumps the version, so a read that raced with a write never stores stale result.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: float | None = 300.0):
+        self.__cache = TTLCache(max_size=max_size, ttl=ttl)
+        self.__version = 0
+
+    @property
+    def version(self) -> int:
+        return self.__version
+
+    @property
+    def stats(self) -> CacheStats:
+        return self.__cache.stats
+
+    @staticmethod
+    def user_key(user_id: Any) -> tuple:
+        return _USER, int(user_id)
+
+    @staticmethod
+    def normalize_search_params(params: dict[str, Any]) -> dict[str, Any]:
+        """Strips string values and drops empty ones, search should be called with these params to match the key"""
+        normalized = {
+            key: value.strip() if isinstance(value, str) else value
+            for key, value in params.items()
+        }
+        return {key: value for key, value in normalized.items() if value}
+
+    @staticmethod
+    def search_key(normalized_params: dict[str, Any]) -> tuple:
+        return _SEARCH, tuple(sorted(normalized_params.items()))
+
+    def get(self, key: tuple) -> str | None:
+        return self.__cache.get(key)
+
+    def put(self, key: tuple, result: str, version: int) -> None:
+        if version == self.__version:
+            self.__cache.put(key, result)
+
+    def invalidate_user(self, user_id: Any) -> None:
+        """Drops cached user and all search results (they may contain this user)"""
+        self.invalidate_searches()
+        try:
+            self.__cache.pop(self.user_key(user_id))
+        except (TypeError, ValueError):
+            pass
+
+    def invalidate_searches(self) -> None:
+        self.__version += 1
+        self.__cache.remove_if(lambda key: key[0] == _SEARCH)
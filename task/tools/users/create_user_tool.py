@@ -1,6 +1,7 @@
+from concurrent.futures import Executor
 from typing import Any
 
-from task.tools.users.base import BaseUserServiceTool
+from task.tools.users.base import BaseUserServiceTool, model_schema
 from task.tools.users.models.user_info import UserCreate
 
 
@@ -20,7 +21,7 @@ class CreateUserTool(BaseUserServiceTool):
     @property
     def input_schema(self) -> dict[str, Any]:
         #TODO: Provide tool params Schema. To do that you can create json schema from UserCreate pydentic model ` UserCreate.model_json_schema()`
-        return UserCreate.model_json_schema()
+        return model_schema(UserCreate)
 
     def execute(self, arguments: dict[str, Any]) -> str:
         #TODO:
@@ -29,7 +30,21 @@ class CreateUserTool(BaseUserServiceTool):
         # 3. Optional: You can wrap it with `try-except` and return error as string `f"Error while creating a new user: {str(e)}"`
         try:
             user = UserCreate.model_validate(arguments)
-            created_user = self._user_client.add_user(user)
-            return created_user
+            try:
+                return self._user_client.add_user(user)
+            finally:
+                if self._cache:
+                    self._cache.invalidate_searches()
+        except Exception as e:
+            return f"Error while creating a new user: {str(e)}"
+
+    async def execute_async(self, arguments: dict[str, Any], executor: Executor | None = None) -> str:
+        try:
+            user = UserCreate.model_validate(arguments)
+            try:
+                return await self._user_client.add_user_async(user)
+            finally:
+                if self._cache:
+                    self._cache.invalidate_searches()
         except Exception as e:
             return f"Error while creating a new user: {str(e)}"
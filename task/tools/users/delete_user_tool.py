@@ -1,3 +1,4 @@
+from concurrent.futures import Executor
 from typing import Any
 
 from task.tools.users.base import BaseUserServiceTool
@@ -41,7 +42,21 @@ class DeleteUserTool(BaseUserServiceTool):
         # 3. Optional: You can wrap it with `try-except` and return error as string `f"Error while deleting user by id: {str(e)}"`
         try:
             user_id = arguments.get("id")
-            created_user = self._user_client.delete_user(user_id)
-            return created_user
+            try:
+                return self._user_client.delete_user(user_id)
+            finally:
+                if self._cache:
+                    self._cache.invalidate_user(user_id)
         except Exception as e:
-            return f"Error while deleting user by id: {str(e)}"
\ No newline at end of file
+            return f"Error while deleting user by id: {str(e)}"
+
+    async def execute_async(self, arguments: dict[str, Any], executor: Executor | None = None) -> str:
+        try:
+            user_id = arguments.get("id")
+            try:
+                return await self._user_client.delete_user_async(user_id)
+            finally:
+                if self._cache:
+                    self._cache.invalidate_user(user_id)
+        except Exception as e:
+            return f"Error while deleting user by id: {str(e)}"
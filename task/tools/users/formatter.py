@@ -0,0 +1,62 @@
+from typing import Any
+
+# Columns of search results, the model gets full user with `get_user_by_id`
+SEARCH_FIELDS = ("id", "name", "surname", "email", "phone", "gender", "company")
+
+
+class UserFormatter:
+    """
+    Formats user service results for tool messages. Tool results stay in history and are re-sent on every following
+    request, so they are kept compact: a single user as `key: value` lines, a list of users as a `|` separated table
+    with one header line, limited to `max_results` rows.
+    """
+
+    def __init__(
+            self,
+            user_fields: tuple[str, ...] | None = None,
+            search_fields: tuple[str, ...] | None = SEARCH_FIELDS,
+            max_results: int | None = 20,
+    ):
+        """
+        :param user_fields: fields shown for single user, all fields when None
+        :param search_fields: table columns for user lists, all fields of the first user when None
+        :param max_results: rows shown for user lists, the rest is replaced with "N more results" line
+        """
+        self.__user_fields = user_fields
+        self.__search_fields = search_fields
+        self.__max_results = max_results
+
+    @staticmethod
+    def _value_to_string(value: Any) -> str:
+        if value is None:
+            return ""
+        if isinstance(value, dict):
+            return ", ".join(
+                f"{k}={UserFormatter._value_to_string(v)}" for k, v in value.items() if v not in (None, "")
+            )
+        if isinstance(value, list):
+            return ", ".join(UserFormatter._value_to_string(v) for v in value)
+        return str(value)
+
+    def format_user(self, user: dict[str, Any]) -> str:
+        fields = self.__user_fields or user.keys()
+        return "\n".join(
+            f"{field}: {self._value_to_string(user[field])}"
+            for field in fields
+            if user.get(field) not in (None, "")
+        )
+
+    def format_users(self, users: list[dict[str, Any]]) -> str:
+        if not users:
+            return "No users found"
+        fields = self.__search_fields or tuple(users[0].keys())
+        shown = users if self.__max_results is None else users[:self.__max_results]
+        lines = [" | ".join(fields)]
+        for user in shown:
+            lines.append(" | ".join(
+                self._value_to_string(user.get(field)).replace("|", "/").replace("\n", " ") for field in fields
+            ))
+        hidden = len(users) - len(shown)
+        if hidden:
+            lines.append(f"... {hidden} more results, refine the search to see them")
+        return "\n".join(lines)
@@ -1,3 +1,4 @@
+from concurrent.futures import Executor
 from typing import Any
 
 from task.tools.users.base import BaseUserServiceTool
@@ -5,6 +6,8 @@ from task.tools.users.base import BaseUserServiceTool
 
 class GetUserByIdTool(BaseUserServiceTool):
 
+    read_only = True
+
     @property
     def name(self) -> str:
         #TODO: Provide tool name as `get_user_by_id`
@@ -41,7 +44,31 @@ class GetUserByIdTool(BaseUserServiceTool):
         # 3. Optional: You can wrap it with `try-except` and return error as string `f"Error while retrieving user by id: {str(e)}"`
         try:
             user_id = arguments.get("id")
-            user_info = self._user_client.get_user(user_id)
+            if self._cache is None:
+                return self._user_client.get_user(user_id)
+
+            key = self._cache.user_key(user_id)
+            user_info = self._cache.get(key)
+            if user_info is None:
+                version = self._cache.version
+                user_info = self._user_client.get_user(user_id)
+                self._cache.put(key, user_info, version)
+            return user_info
+        except Exception as e:
+            return f"Error while retrieving user by id: {str(e)}"
+
+    async def execute_async(self, arguments: dict[str, Any], executor: Executor | None = None) -> str:
+        try:
+            user_id = arguments.get("id")
+            if self._cache is None:
+                return await self._user_client.get_user_async(user_id)
+
+            key = self._cache.user_key(user_id)
+            user_info = self._cache.get(key)
+            if user_info is None:
+                version = self._cache.version
+                user_info = await self._user_client.get_user_async(user_id)
+                self._cache.put(key, user_info, version)
             return user_info
         except Exception as e:
-            return f"Error while retrieving user by id: {str(e)}"
\ No newline at end of file
+            return f"Error while retrieving user by id: {str(e)}"
@@ -0,0 +1,226 @@
+import threading
+import time
+from collections import defaultdict
+from typing import Any
+
+from task.tools.users.user_client import UserClient
+
+# Fields the replica indexes, same as `UserClient.search_users` params
+SEARCH_FIELDS = ("name", "surname", "email", "gender")
+# Fields matched only as a whole value (`male` must not match `female`)
+EXACT_FIELDS = ("gender",)
+
+
+def _normalize(value: Any) -> str:
+    return str(value).strip().casefold() if value is not None else ""
+
+
+def _trigrams(value: str) -> set[str]:
+    """Trigrams of the value padded like in pg_trgm, so short values and word edges get trigrams too"""
+    padded = f"  {value} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class _UserIndex:
+    """
+    Users by id with per field indexes: inverted index (normalized value -> ids) and trigram index
+    (trigram -> ids). Not thread-safe, `UserReplica` guards it.
+    """
+
+    def __init__(self):
+        self.users: dict[int, dict[str, Any]] = {}
+        self.__values: dict[str, dict[str, set[int]]] = {field: defaultdict(set) for field in SEARCH_FIELDS}
+        self.__trigrams: dict[str, dict[str, set[int]]] = {field: defaultdict(set) for field in SEARCH_FIELDS}
+        self.__trigram_counts: dict[str, dict[int, int]] = {field: {} for field in SEARCH_FIELDS}
+
+    def add(self, user: dict[str, Any]) -> None:
+        user_id = int(user["id"])
+        self.remove(user_id)
+        self.users[user_id] = user
+        for field in SEARCH_FIELDS:
+            value = _normalize(user.get(field))
+            if not value:
+                continue
+            self.__values[field][value].add(user_id)
+            trigrams = _trigrams(value)
+            self.__trigram_counts[field][user_id] = len(trigrams)
+            for trigram in trigrams:
+                self.__trigrams[field][trigram].add(user_id)
+
+    def remove(self, user_id: int) -> None:
+        user = self.users.pop(user_id, None)
+        if user is None:
+            return
+        for field in SEARCH_FIELDS:
+            value = _normalize(user.get(field))
+            if not value:
+                continue
+            self.__discard(self.__values[field], value, user_id)
+            self.__trigram_counts[field].pop(user_id, None)
+            for trigram in _trigrams(value):
+                self.__discard(self.__trigrams[field], trigram, user_id)
+
+    @staticmethod
+    def __discard(index: dict[str, set[int]], key: str, user_id: int) -> None:
+        ids = index.get(key)
+        if ids is not None:
+            ids.discard(user_id)
+            if not ids:
+                del index[key]
+
+    def match(self, field: str, query: str, min_similarity: float) -> dict[int, float]:
+        """
+        Ids matching `query` in `field` with a score: 2 for equal value, 1 for substring,
+        trigram similarity (0..1) for fuzzy matches when there is no exact or substring match.
+        """
+        values = self.__values[field]
+        exact = values.get(query, set())
+        if field in EXACT_FIELDS:
+            return dict.fromkeys(exact, 2.0)
+
+        scores = dict.fromkeys(exact, 2.0)
+        trigrams = self.__trigrams[field]
+        # Unpadded trigrams of query are contained in trigrams of every value that contains the query
+        inner = [query[i:i + 3] for i in range(len(query) - 2)]
+        if inner:
+            candidates = set.intersection(*(trigrams.get(trigram, set()) for trigram in inner))
+            for user_id in candidates:
+                if user_id not in scores and query in _normalize(self.users[user_id].get(field)):
+                    scores[user_id] = 1.0
+        else:
+            # 1-2 chars are too short for trigrams, scan distinct values
+            for value, ids in values.items():
+                if query in value:
+                    for user_id in ids:
+                        scores.setdefault(user_id, 1.0)
+        if scores:
+            return scores
+
+        query_trigrams = _trigrams(query)
+        shared: dict[int, int] = defaultdict(int)
+        for trigram in query_trigrams:
+            for user_id in trigrams.get(trigram, ()):
+                shared[user_id] += 1
+        counts = self.__trigram_counts[field]
+        for user_id, count in shared.items():
+            similarity = count / (len(query_trigrams) + counts[user_id] - count)
+            if similarity >= min_similarity:
+                scores[user_id] = similarity
+        return scores
+
+
+class UserReplica:
+    """
+    In-process copy of all users for `search_users`: answers from local indexes instead of the user service and
+    tolerates typos and partial values (trigram similarity).
+
+    Loaded in bulk with `load()`, kept in sync incrementally with writes made through `user_client`, and reloaded
+    in a background thread when older than `refresh_interval` (writes made by others show up after the refresh).
+    """
+
+    def __init__(self, user_client: UserClient, refresh_interval: float | None = 300.0, min_similarity: float = 0.25):
+        self.__user_client = user_client
+        self.__refresh_interval = refresh_interval
+        self.__min_similarity = min_similarity
+        self.__index: _UserIndex | None = None
+        self.__lock = threading.Lock()
+        self.__loaded_at = 0.0
+        self.__refreshing = False
+        # Writes that happen while a reload is in flight, replayed on the new index before it replaces the old one
+        self.__pending_writes: list[tuple[int, dict[str, Any] | None]] | None = None
+        user_client.add_write_listener(self.__on_write)
+
+    @property
+    def ready(self) -> bool:
+        return self.__index is not None
+
+    def __len__(self) -> int:
+        index = self.__index
+        return len(index.users) if index else 0
+
+    def load(self) -> None:
+        """Loads all users from the service and swaps indexes"""
+        with self.__lock:
+            self.__pending_writes = []
+        try:
+            users = self.__user_client.list_users()
+            index = _UserIndex()
+            for user in users:
+                index.add(user)
+            with self.__lock:
+                for user_id, user in self.__pending_writes:
+                    self.__apply_write(index, user_id, user)
+                self.__index = index
+                self.__loaded_at = time.monotonic()
+        finally:
+            with self.__lock:
+                self.__pending_writes = None
+        print(f"User replica loaded {len(index.users)} users")
+
+    def __refresh_in_background(self) -> None:
+        def refresh():
+            try:
+                self.load()
+            except Exception as e:
+                print(f"User replica refresh failed: {e}")
+            finally:
+                self.__refreshing = False
+
+        with self.__lock:
+            if self.__refreshing:
+                return
+            self.__refreshing = True
+        threading.Thread(target=refresh, name="user-replica-refresh", daemon=True).start()
+
+    @staticmethod
+    def __apply_write(index: _UserIndex, user_id: int, user: dict[str, Any] | None) -> None:
+        if user is None:
+            index.remove(user_id)
+        else:
+            # Update response may carry only changed fields, merge into what is known
+            index.add({**index.users.get(user_id, {}), **user, "id": user_id})
+
+    def __on_write(self, user_id: int, user: dict[str, Any] | None) -> None:
+        with self.__lock:
+            if self.__index is not None:
+                self.__apply_write(self.__index, user_id, user)
+            if self.__pending_writes is not None:
+                self.__pending_writes.append((user_id, user))
+
+    def search(
+            self,
+            name: str | None = None,
+            surname: str | None = None,
+            email: str | None = None,
+            gender: str | None = None,
+    ) -> list[dict[str, Any]]:
+        """
+        Users matching all given params, best matches first: equal values, then substrings, then similar values.
+        Raises if the replica isn't loaded.
+        """
+        if self.__index is None:
+            raise Exception("User replica is not loaded")
+        if self.__refresh_interval is not None and time.monotonic() - self.__loaded_at > self.__refresh_interval:
+            self.__refresh_in_background()
+
+        params = {"name": name, "surname": surname, "email": email, "gender": gender}
+        with self.__lock:
+            index = self.__index
+            scores: dict[int, float] | None = None
+            for field, query in params.items():
+                query = _normalize(query)
+                if not query:
+                    continue
+                matches = index.match(field, query, self.__min_similarity)
+                if scores is None:
+                    scores = matches
+                else:
+                    scores = {
+                        user_id: score + matches[user_id] for user_id, score in scores.items() if user_id in matches
+                    }
+                if not scores:
+                    return []
+            if scores is None:
+                return list(index.users.values())
+            ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+            return [index.users[user_id] for user_id, _ in ranked]
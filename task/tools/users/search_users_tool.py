@@ -1,10 +1,23 @@
+from concurrent.futures import Executor
 from typing import Any
 
 from task.tools.users.base import BaseUserServiceTool
+from task.tools.users.cache import UserCache
+from task.tools.users.replica import UserReplica
+from task.tools.users.user_client import UserClient
 
 
 class SearchUsersTool(BaseUserServiceTool):
 
+    read_only = True
+
+    def __init__(self, user_client: UserClient, cache: UserCache | None = None, replica: UserReplica | None = None):
+        """
+        :param replica: loaded local replica answers searches instead of the user service
+        """
+        super().__init__(user_client, cache)
+        self._replica = replica
+
     @property
     def name(self) -> str:
         #TODO: Provide tool name as `search_users`
@@ -13,7 +26,8 @@ class SearchUsersTool(BaseUserServiceTool):
     @property
     def description(self) -> str:
         #TODO: Provide description of this tool
-        description = "Searches for users in the system based on provided criteria such as name, surname, email, and gender."
+        description = ("Searches for users in the system based on provided criteria such as name, surname, email, and gender. "
+                       "Returns a table with main fields of the best matches, use `get_user_by_id` for full user info.")
         return description
 
     @property
@@ -49,7 +63,41 @@ class SearchUsersTool(BaseUserServiceTool):
         # 1. Call user_client search_users (with `**arguments`) and return its results
         # 2. Optional: You can wrap it with `try-except` and return error as string `f"Error while searching users: {str(e)}"`
         try:
-            users = self._user_client.search_users(**arguments)
+            if self._replica is not None and self._replica.ready:
+                return self.__search_replica(arguments)
+            if self._cache is None:
+                return self._user_client.search_users(**arguments)
+
+            params = self._cache.normalize_search_params(arguments)
+            key = self._cache.search_key(params)
+            users = self._cache.get(key)
+            if users is None:
+                version = self._cache.version
+                users = self._user_client.search_users(**params)
+                self._cache.put(key, users, version)
+            return users
+        except Exception as e:
+            return f"Error while searching users: {str(e)}"
+
+    async def execute_async(self, arguments: dict[str, Any], executor: Executor | None = None) -> str:
+        try:
+            if self._replica is not None and self._replica.ready:
+                return self.__search_replica(arguments)
+            if self._cache is None:
+                return await self._user_client.search_users_async(**arguments)
+
+            params = self._cache.normalize_search_params(arguments)
+            key = self._cache.search_key(params)
+            users = self._cache.get(key)
+            if users is None:
+                version = self._cache.version
+                users = await self._user_client.search_users_async(**params)
+                self._cache.put(key, users, version)
             return users
         except Exception as e:
             return f"Error while searching users: {str(e)}"
+
+    def __search_replica(self, arguments: dict[str, Any]) -> str:
+        users = self._replica.search(**arguments)
+        print(f"Get {len(users)} users successfully from replica")
+        return self._user_client.formatter.format_users(users)
@@ -1,6 +1,7 @@
+from concurrent.futures import Executor
 from typing import Any
 
-from task.tools.users.base import BaseUserServiceTool
+from task.tools.users.base import BaseUserServiceTool, model_schema
 from task.tools.users.models.user_info import UserUpdate
 
 
@@ -30,7 +31,7 @@ class UpdateUserTool(BaseUserServiceTool):
                     "type": "integer",
                     "description": "The unique identifier of the user to be updated"
                 },
-                "new_info": UserUpdate.model_json_schema()
+                "new_info": model_schema(UserUpdate)
             },
             "required": [
                 "id",
@@ -49,7 +50,22 @@ class UpdateUserTool(BaseUserServiceTool):
             user_id = arguments.get("id")
             new_info_data = arguments.get("new_info")
             new_info = UserUpdate.model_validate(new_info_data)
-            updated_user = self._user_client.update_user(user_id, new_info)
-            return updated_user
+            try:
+                return self._user_client.update_user(user_id, new_info)
+            finally:
+                if self._cache:
+                    self._cache.invalidate_user(user_id)
+        except Exception as e:
+            return f"Error while updating user: {str(e)}"
+
+    async def execute_async(self, arguments: dict[str, Any], executor: Executor | None = None) -> str:
+        try:
+            user_id = arguments.get("id")
+            new_info = UserUpdate.model_validate(arguments.get("new_info"))
+            try:
+                return await self._user_client.update_user_async(user_id, new_info)
+            finally:
+                if self._cache:
+                    self._cache.invalidate_user(user_id)
         except Exception as e:
             return f"Error while updating user: {str(e)}"
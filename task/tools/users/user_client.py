@@ -1,49 +1,131 @@
-from typing import Any, Optional
-
-import requests
+import json
+import threading
+from typing import TYPE_CHECKING, Any, Callable, Optional
 
+from task.tools.users.formatter import UserFormatter
 from task.tools.users.models.user_info import UserCreate, UserUpdate
 
+if TYPE_CHECKING:
+    # Imported on first use, async tools need only `aiohttp` and sync ones only `requests`
+    import aiohttp
+    import requests
+
+    from task.cassette import Cassette
+
 USER_SERVICE_ENDPOINT = "http://localhost:8041"
 
+# Called after successful write with the written user (create/update) or `None` and user id (delete)
+WriteListener = Callable[[int, dict[str, Any] | None], None]
+
 class UserClient:
 
-    def __user_to_string(self, user: dict[str, Any]):
-        user_str = "```\n"
-        for key, value in user.items():
-            user_str += f"  {key}: {value}\n"
-        user_str += "```\n"
+    def __init__(
+            self,
+            endpoint: str = USER_SERVICE_ENDPOINT,
+            connection_limit: int = 20,
+            keepalive_timeout: float = 60.0,
+            formatter: UserFormatter | None = None,
+            cassette: "Cassette | None" = None,
+    ):
+        """
+        :param cassette: records user service responses to or replays them from a cassette file
+        """
+        self.__endpoint = endpoint
+        self.__formatter = formatter or UserFormatter()
+        self.__write_listeners: list[WriteListener] = []
+        self.__headers = {"Content-Type": "application/json"}
+        self.__connection_limit = connection_limit
+        self.__keepalive_timeout = keepalive_timeout
+        self.__session: "aiohttp.ClientSession | None" = None
+        self.__sync_session: "requests.Session | None" = None
+        self.__sync_session_lock = threading.Lock()
+        self.__cassette = cassette
 
-        return user_str
+    async def __aenter__(self) -> "UserClient":
+        return self
 
-    def __users_to_string(self, users: list[dict[str, Any]]):
-        users_str = ""
-        for value in users:
-            users_str += self.__user_to_string(value)
-        users_str += "\n"
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        await self.aclose()
 
-        return users_str
+    def _get_session(self) -> "aiohttp.ClientSession":
+        """Returns keep-alive session shared by all async calls, creates it on first use"""
+        import aiohttp
 
-    def get_user(self, user_id: int) -> str:
-        headers = {"Content-Type": "application/json"}
+        if self.__session is None or self.__session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.__connection_limit,
+                keepalive_timeout=self.__keepalive_timeout,
+            )
+            session = aiohttp.ClientSession(
+                base_url=self.__endpoint,
+                headers=self.__headers,
+                connector=connector
+            )
+            if self.__cassette is not None:
+                session = self.__cassette.wrap(session, base_url=self.__endpoint)
+            self.__session = session
+        return self.__session
 
-        response = requests.get(url=f"{USER_SERVICE_ENDPOINT}/v1/users/{user_id}", headers=headers)
+    def _get_sync_session(self) -> "requests.Session":
+        """Returns pooled `requests` session shared by sync calls (they run in tool threads), creates it on first use"""
+        with self.__sync_session_lock:
+            if self.__sync_session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
 
-        if response.status_code == 200:
-            data = response.json()
-            return self.__user_to_string(data)
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.__connection_limit)
+                self.__sync_session = requests.Session()
+                self.__sync_session.mount("http://", adapter)
+                self.__sync_session.mount("https://", adapter)
+                if self.__cassette is not None:
+                    self.__cassette.mount(self.__sync_session)
+            return self.__sync_session
 
-        raise Exception(f"HTTP {response.status_code}: {response.text}")
+    async def aclose(self) -> None:
+        if self.__session is not None and not self.__session.closed:
+            await self.__session.close()
+        self.__session = None
+        with self.__sync_session_lock:
+            if self.__sync_session is not None:
+                self.__sync_session.close()
+                self.__sync_session = None
 
-    def search_users(
-            self,
+    @property
+    def formatter(self) -> UserFormatter:
+        return self.__formatter
+
+    def add_write_listener(self, listener: WriteListener) -> None:
+        self.__write_listeners.append(listener)
+
+    def __notify_write(self, user_id: int | None, body: str | None) -> None:
+        """`body` is JSON of the written user, `None` for delete. Write has already succeeded, so nothing is raised"""
+        if not self.__write_listeners:
+            return
+        try:
+            user = json.loads(body) if body is not None else None
+            user_id = int(user["id"] if user_id is None else user_id)
+        except (ValueError, TypeError, KeyError) as e:
+            print(f"Can't notify about user write: {e}")
+            return
+        for listener in self.__write_listeners:
+            try:
+                listener(user_id, user)
+            except Exception as e:
+                print(f"User write listener failed: {e}")
+
+    def __user_to_string(self, user: dict[str, Any]) -> str:
+        return self.__formatter.format_user(user)
+
+    def __users_to_string(self, users: list[dict[str, Any]]) -> str:
+        return self.__formatter.format_users(users)
+
+    @staticmethod
+    def __search_params(
             name: Optional[str] = None,
             surname: Optional[str] = None,
             email: Optional[str] = None,
             gender: Optional[str] = None,
-    ) -> str:
-        headers = {"Content-Type": "application/json"}
-
+    ) -> dict[str, str]:
         params = {}
         if name:
             params["name"] = name
@@ -53,8 +135,39 @@ class UserClient:
             params["email"] = email
         if gender:
             params["gender"] = gender
+        return params
 
-        response = requests.get(url=USER_SERVICE_ENDPOINT + "/v1/users/search", headers=headers, params=params)
+    def get_user(self, user_id: int) -> str:
+        response = self._get_sync_session().get(url=f"{self.__endpoint}/v1/users/{user_id}", headers=self.__headers)
+
+        if response.status_code == 200:
+            data = response.json()
+            return self.__user_to_string(data)
+
+        raise Exception(f"HTTP {response.status_code}: {response.text}")
+
+    async def get_user_async(self, user_id: int) -> str:
+        async with self._get_session().get(f"/v1/users/{user_id}") as response:
+            if response.status == 200:
+                data = await response.json()
+                return self.__user_to_string(data)
+
+            raise Exception(f"HTTP {response.status}: {await response.text()}")
+
+    def search_users(
+            self,
+            name: Optional[str] = None,
+            surname: Optional[str] = None,
+            email: Optional[str] = None,
+            gender: Optional[str] = None,
+    ) -> str:
+        params = self.__search_params(name, surname, email, gender)
+
+        response = self._get_sync_session().get(
+            url=f"{self.__endpoint}/v1/users/search",
+            headers=self.__headers,
+            params=params
+        )
 
         if response.status_code == 200:
             data = response.json()
@@ -63,40 +176,92 @@ class UserClient:
 
         raise Exception(f"HTTP {response.status_code}: {response.text}")
 
-    def add_user(self, user_create_model: UserCreate) -> str:
-        headers = {"Content-Type": "application/json"}
+    async def search_users_async(
+            self,
+            name: Optional[str] = None,
+            surname: Optional[str] = None,
+            email: Optional[str] = None,
+            gender: Optional[str] = None,
+    ) -> str:
+        params = self.__search_params(name, surname, email, gender)
+
+        async with self._get_session().get("/v1/users/search", params=params) as response:
+            if response.status == 200:
+                data = await response.json()
+                print(f"Get {len(data)} users successfully")
+                return self.__users_to_string(data)
 
-        response = requests.post(
-            url=f"{USER_SERVICE_ENDPOINT}/v1/users",
-            headers=headers,
+            raise Exception(f"HTTP {response.status}: {await response.text()}")
+
+    def list_users(self) -> list[dict[str, Any]]:
+        """All users as returned by the service"""
+        response = self._get_sync_session().get(url=f"{self.__endpoint}/v1/users", headers=self.__headers)
+
+        if response.status_code == 200:
+            return response.json()
+
+        raise Exception(f"HTTP {response.status_code}: {response.text}")
+
+    def add_user(self, user_create_model: UserCreate) -> str:
+        response = self._get_sync_session().post(
+            url=f"{self.__endpoint}/v1/users",
+            headers=self.__headers,
             json=user_create_model.model_dump()
         )
 
         if response.status_code == 201:
+            self.__notify_write(None, response.text)
             return f"User successfully added: {response.text}"
 
         raise Exception(f"HTTP {response.status_code}: {response.text}")
 
-    def update_user(self, user_id: int, user_update_model: UserUpdate) -> str:
-        headers = {"Content-Type": "application/json"}
+    async def add_user_async(self, user_create_model: UserCreate) -> str:
+        async with self._get_session().post("/v1/users", json=user_create_model.model_dump()) as response:
+            text = await response.text()
+            if response.status == 201:
+                self.__notify_write(None, text)
+                return f"User successfully added: {text}"
 
-        response = requests.put(
-            url=f"{USER_SERVICE_ENDPOINT}/v1/users/{user_id}",
-            headers=headers,
+            raise Exception(f"HTTP {response.status}: {text}")
+
+    def update_user(self, user_id: int, user_update_model: UserUpdate) -> str:
+        response = self._get_sync_session().put(
+            url=f"{self.__endpoint}/v1/users/{user_id}",
+            headers=self.__headers,
             json=user_update_model.model_dump()
         )
 
         if response.status_code == 201:
+            self.__notify_write(user_id, response.text)
             return f"User successfully updated: {response.text}"
 
         raise Exception(f"HTTP {response.status_code}: {response.text}")
 
-    def delete_user(self, user_id: int) -> str:
-        headers = {"Content-Type": "application/json"}
+    async def update_user_async(self, user_id: int, user_update_model: UserUpdate) -> str:
+        async with self._get_session().put(
+                f"/v1/users/{user_id}",
+                json=user_update_model.model_dump()
+        ) as response:
+            text = await response.text()
+            if response.status == 201:
+                self.__notify_write(user_id, text)
+                return f"User successfully updated: {text}"
 
-        response = requests.delete(url=f"{USER_SERVICE_ENDPOINT}/v1/users/{user_id}", headers=headers)
+            raise Exception(f"HTTP {response.status}: {text}")
+
+    def delete_user(self, user_id: int) -> str:
+        response = self._get_sync_session().delete(url=f"{self.__endpoint}/v1/users/{user_id}", headers=self.__headers)
 
         if response.status_code == 204:
+            self.__notify_write(user_id, None)
             return "User successfully deleted"
 
         raise Exception(f"HTTP {response.status_code}: {response.text}")
+
+    async def delete_user_async(self, user_id: int) -> str:
+        async with self._get_session().delete(f"/v1/users/{user_id}") as response:
+            if response.status == 204:
+                self.__notify_write(user_id, None)
+                return "User successfully deleted"
+
+            raise Exception(f"HTTP {response.status}: {await response.text()}")
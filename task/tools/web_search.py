@@ -1,15 +1,64 @@
-from typing import Any
-
-import requests
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import TYPE_CHECKING, Any
 
+from task.cache import RequestCoalescer, TTLCache
+from task.deployments import DeploymentPool
+from task.retry import HTTPStatusError
 from task.tools.base import BaseTool
 
+if TYPE_CHECKING:
+    import requests
+
+    from task.cassette import Cassette
+
 
 class WebSearchTool(BaseTool):
 
-    def __init__(self, api_key: str, endpoint: str):
+    read_only = True
+
+    def __init__(
+            self,
+            api_key: str,
+            endpoint: str,
+            cache: TTLCache | None = None,
+            cache_path: str | None = None,
+            deployment_name: str = "gemini-2.5-pro",
+            deployments: DeploymentPool | None = None,
+            cassette: "Cassette | None" = None,
+    ):
+        """
+        :param cache: cache of search results by normalized query, `None` disables caching
+        :param cache_path: JSON file to persist `cache` between restarts
+        :param deployment_name: model with Google Search grounding
+        :param deployments: interchangeable deployments to route searches between, instead of `deployment_name`
+        :param cassette: records search responses to or replays them from a cassette file
+        """
         self.__api_key = api_key
-        self.__endpoint = f"{endpoint}/openai/deployments/gemini-2.5-pro/chat/completions"
+        self.__deployments = deployments or DeploymentPool.single(deployment_name, endpoint)
+        self.__session: "requests.Session | None" = None
+        self.__session_lock = threading.Lock()
+        self.__cache = cache
+        self.__cache_path = cache_path if cache is not None else None
+        self.__cache_file_lock = threading.Lock()
+        self.__coalescer = RequestCoalescer()
+        self.__cassette = cassette
+        if self.__cache_path:
+            self.__load_cache()
+
+    def __get_session(self) -> "requests.Session":
+        """`requests` is imported on the first search, not at agent startup"""
+        with self.__session_lock:
+            if self.__session is None:
+                import requests
+
+                self.__session = requests.Session()
+                if self.__cassette is not None:
+                    self.__cassette.mount(self.__session)
+            return self.__session
 
     # https://dialx.ai/dial_api#operation/sendChatCompletionRequest (-> tools -> function)
     # Sample of tool config:
@@ -69,6 +118,37 @@ class WebSearchTool(BaseTool):
         #    - "tools": [{"type": "static_function", "static_function": {"name": "google_search", "description": "Grounding with Google Search","configuration": {}}}]
         # 3. Make POST call with `requests` lib: `url=self.__endpoint, headers=headers, json=request_dat`
         # 4. Check if response status is 200 and if yes then return message content, otherwise return `f"Error: {response.status_code} {response.text}"`
+        # Results are cached by normalized query (if cache is configured), errors are not cached.
+        query = str(arguments["request"])
+        key = self.__normalize(query)
+        if self.__cache is not None:
+            cached = self.__cache.get(key)
+            if cached is not None:
+                return cached
+        try:
+            # Identical queries running at the same time (e.g. from different sessions) share one upstream call
+            return self.__coalescer.run(key, lambda: self.__search_and_cache(key, query))
+        except Exception as e:
+            return f"Error: {str(e)}"
+
+    @staticmethod
+    def __normalize(query: str) -> str:
+        return " ".join(query.split()).casefold()
+
+    def __search_and_cache(self, key: str, query: str) -> str:
+        if self.__cache is not None:
+            # Previous leader for this key may have finished right before this call became the leader
+            cached = self.__cache.get(key)
+            if cached is not None:
+                return cached
+        result = self.__search(query)
+        if self.__cache is not None:
+            self.__cache.put(key, result)
+            if self.__cache_path:
+                self.__save_cache()
+        return result
+
+    def __search(self, query: str) -> str:
         headers = {
             "api-key": self.__api_key,
             "Content-Type": "application/json"
@@ -77,7 +157,7 @@ class WebSearchTool(BaseTool):
             "messages": [
                 {
                     "role": "user",
-                    "content": str(arguments["request"])
+                    "content": query
                 }
             ],
             "tools": [
@@ -91,15 +171,57 @@ class WebSearchTool(BaseTool):
                 }
             ]
         }
-        response = requests.post(
-            url=self.__endpoint,
-            headers=headers,
-            json=request_data
-        )
+        deployment = self.__deployments.acquire()
+        try:
+            response = self.__get_session().post(
+                url=deployment.url,
+                headers=headers,
+                json=request_data
+            )
+        except Exception as e:
+            self.__deployments.release(deployment, error=e)
+            raise
         if response.status_code == 200:
+            self.__deployments.release(deployment, ttft=response.elapsed.total_seconds())
             response_json = response.json()
             message_content = response_json["choices"][0]["message"]["content"]
             return message_content
         else:
-            return f"Error: {response.status_code} {response.text}"
+            retry_after = response.headers.get("Retry-After")
+            self.__deployments.release(deployment, error=HTTPStatusError(response.status_code, response.text, retry_after))
+            raise Exception(f"{response.status_code} {response.text}")
+
+    def __load_cache(self) -> None:
+        if not os.path.exists(self.__cache_path):
+            return
+        try:
+            with open(self.__cache_path, "r", encoding="utf-8") as f:
+                entries = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Web search cache is not loaded from {self.__cache_path}: {e}")
+            return
+        now = time.time()
+        self.__cache.restore([
+            (key, value, None if expires_at is None else expires_at - now)
+            for key, value, expires_at in entries
+        ])
 
+    def __save_cache(self) -> None:
+        """Writes cache snapshot to temp file and atomically replaces `cache_path` with it"""
+        now = time.time()
+        entries = [
+            [key, value, None if remaining is None else now + remaining]
+            for key, value, remaining in self.__cache.snapshot()
+        ]
+        directory = os.path.dirname(os.path.abspath(self.__cache_path))
+        with self.__cache_file_lock:
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(entries, f, ensure_ascii=False)
+                os.replace(tmp_path, self.__cache_path)
+            except OSError as e:
+                print(f"Web search cache is not saved to {self.__cache_path}: {e}")
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)